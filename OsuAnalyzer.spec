@@ -17,11 +17,9 @@ a = Analysis(
         ('backend.py', '.'),
         ('osu_db.py', '.'),
         ('osu_string.py', '.'),
+        ('osr_header.py', '.'),
         ('path_util.py', '.'),
         ('array_adapter.py', '.'),
-        ('beatmapparser.py', '.'),
-        ('slidercalc.py', '.'),
-        ('curve.py', '.'),
         ('icons', 'icons'),
         ('style.qss', '.'),
         (osrparse_metadata_path, osrparse_metadata_name)
@@ -4,24 +4,33 @@ import configparser
 import os
 import sys
 import time
-import statistics
-import traceback # For better error printing
 import logging # For better logging
 import math # For abs value comparison
 import logging.handlers
+import queue # Log records are handed to a background writer thread
+import atexit
 import csv
 import re
-from datetime import datetime
+import bisect # Finding the first of several equal input times
+import lzma # Replay frame data
+import functools # For caching parsed replays
+import operator # attrgetter for osu!.db entry fields
+import threading # For waiting on background analysis stages
+import shelve # Persistent star rating cache
+import pickle # Parsed osu!.db cache
+import sqlite3 # Persistent beatmap hash index
 from collections import defaultdict # For grouping stats
+from collections import namedtuple # Slim osu!.db entries
 
 # --- PyQt6 Imports (Keep necessary ones for backend classes) ---
 try:
     # Keep QObject, QThread, pyqtSignal for worker/monitor
-    from PyQt6.QtCore import QThread, pyqtSignal, QObject, pyqtSlot
+    from PyQt6.QtCore import QThread, pyqtSignal, QObject, pyqtSlot, QThreadPool, QRunnable, QMutex
     # Keep Mod, Key, GameMode from osrparse
     from osrparse import Replay, GameMode, Mod, Key
     # Keep FileSystemEventHandler, Observer from watchdog
     from watchdog.observers import Observer; from watchdog.events import FileSystemEventHandler
+    import numpy as np
 except ImportError as e:
     # More specific error reporting
     print(f"ERROR: Failed to import required library. Dependency missing or environment issue: {e}")
@@ -32,8 +41,8 @@ except ImportError as e:
 # --- Parser Imports ---
 try: from osu_db import osu_db
 except ImportError: print("ERROR: Failed to import 'osu_db'."); sys.exit(1)
-try: from beatmapparser import BeatmapParser
-except ImportError: print("ERROR: Failed to import 'beatmapparser'."); sys.exit(1)
+try: from osr_header import osr_header, osr_replay
+except ImportError: print("ERROR: Failed to import 'osr_header'."); sys.exit(1)
 
 # --- Configuration ---
 APP_NAME = "OsuAnalyzer" # Define app name for folder
@@ -57,6 +66,9 @@ USER_DATA_DIR = get_user_data_dir()
 CONFIG_FILE = os.path.join(USER_DATA_DIR, 'config.ini')
 DEBUG_LOG_FILE = os.path.join(USER_DATA_DIR, 'log.txt')
 STATS_CSV_FILE = os.path.join(USER_DATA_DIR, 'analysis_stats.csv')
+SR_CACHE_FILE = os.path.join(USER_DATA_DIR, 'sr_cache') # shelve adds its own extension(s)
+BEATMAP_INDEX_FILE = os.path.join(USER_DATA_DIR, 'beatmap_index.sqlite')
+OSU_DB_CACHE_FILE = os.path.join(USER_DATA_DIR, 'osu_db_cache.pkl')
 
 # --- Global Variables (Potentially refactor later if needed) ---
 REPLAYS_FOLDER = ""
@@ -64,6 +76,7 @@ SONGS_FOLDER = ""
 OSU_DB_PATH = ""
 OSU_DB = None
 MANUAL_REPLAY_OFFSET_MS = 0
+_OSU_DB_LOCK = QMutex() # Guards OSU_DB between the GUI thread and analysis stages
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -71,36 +84,65 @@ logger = logging.getLogger()
 
 # Removed DARK_STYLE constant
 
+_LOG_LISTENER = None # QueueListener writing records to the real handlers off the calling thread
+
+def stop_logging():
+    """Stops the background log writer after flushing every queued record and closes its handlers. Safe to call twice."""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        for handler in _LOG_LISTENER.handlers: handler.close() # Releases the debug log file
+        _LOG_LISTENER = None
+atexit.register(stop_logging)
+
 # --- Logging Setup Function ---
-def setup_logging():
-    """Configures logging based on settings in config.ini."""
+def setup_logging(config):
+    """Configures logging based on the LogLevel in an already-parsed config.ini."""
     log_level_str = 'INFO' # Default log level
-    config = configparser.ConfigParser()
-    if os.path.exists(CONFIG_FILE):
-        try:
-            config.read(CONFIG_FILE)
-            if 'Settings' in config: log_level_str = config['Settings'].get('LogLevel', 'INFO').upper()
-        except configparser.Error as e: print(f"Warning: Could not read LogLevel from config file ({CONFIG_FILE}): {e}")
+    if 'Settings' in config: log_level_str = config['Settings'].get('LogLevel', 'INFO').upper()
 
     log_levels = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR}
     log_level = log_levels.get(log_level_str, logging.INFO)
+    global _LOG_LISTENER
     _logger = logging.getLogger(); _logger.setLevel(log_level)
-    for handler in _logger.handlers[:]: _logger.removeHandler(handler)
+    stop_logging() # Flush whatever the previous handlers still had queued
+    for handler in _logger.handlers[:]: _logger.removeHandler(handler); handler.close()
     log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     console_handler = logging.StreamHandler(sys.stdout)
     console_log_level = logging.INFO if log_level > logging.DEBUG else logging.DEBUG
-    console_handler.setLevel(console_log_level); console_handler.setFormatter(log_formatter); _logger.addHandler(console_handler)
+    console_handler.setLevel(console_log_level); console_handler.setFormatter(log_formatter)
+    handlers = [console_handler]; file_handler_error = None
     if log_level == logging.DEBUG:
         try:
             os.makedirs(os.path.dirname(DEBUG_LOG_FILE), exist_ok=True)
             file_handler = logging.FileHandler(DEBUG_LOG_FILE, mode='w', encoding='utf-8')
-            file_handler.setLevel(logging.DEBUG); file_handler.setFormatter(log_formatter); _logger.addHandler(file_handler)
-            _logger.info(f"DEBUG level enabled. Logging detailed output to '{DEBUG_LOG_FILE}'")
-        except Exception as e: _logger.error(f"Failed to create debug log file handler: {e}"); print(f"ERROR: Failed to create debug log file: {e}")
+            file_handler.setLevel(logging.DEBUG); file_handler.setFormatter(log_formatter); handlers.append(file_handler)
+        except Exception as e: file_handler_error = e; print(f"ERROR: Failed to create debug log file: {e}")
+    # Callers (GUI thread, analysis stages) only enqueue; the listener thread does the console/file writes
+    log_queue = queue.SimpleQueue()
+    _logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _LOG_LISTENER = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True); _LOG_LISTENER.start()
+    if file_handler_error is not None: _logger.error(f"Failed to create debug log file handler: {file_handler_error}")
+    elif log_level == logging.DEBUG: _logger.info(f"DEBUG level enabled. Logging detailed output to '{DEBUG_LOG_FILE}'")
     _logger.info(f"Logging level set to {log_level_str}")
     return _logger
 
 # --- Configuration Loading --- (Modified to return paths for GUI) ---
+def _get_config():
+    """Returns the parsed CONFIG_FILE, re-read only when its mtime changes; startup and the GUI
+       share the parser, and save_settings clears the cache after writing its edits.
+    """
+    try: mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError: mtime_ns = None
+    return _read_config(mtime_ns)
+
+@functools.lru_cache(maxsize=1)
+def _read_config(mtime_ns):
+    # mtime_ns is only part of the cache key, so edits made outside the app are picked up
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config
+
 def load_config():
     """Loads and validates paths and settings from the configuration file.
        Returns a tuple: (created_default_config, config_data_dict)
@@ -134,13 +176,14 @@ def load_config():
         try:
             os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
             with open(CONFIG_FILE, 'w') as cf: config.write(cf)
+            _read_config.cache_clear()
             print(f"Default '{CONFIG_FILE}' created.")
             created_default_config = True
             # Set globals to empty for the return dict
             REPLAYS_FOLDER, SONGS_FOLDER, OSU_DB_PATH = '', '', ''
             MANUAL_REPLAY_OFFSET_MS = config_data['replay_offset']
             # Need to set up logging even if default is created
-            setup_logging()
+            setup_logging(config)
         except IOError as e: print(f"ERROR: Could not write default config file: {e}"); sys.exit(f"Exiting. Could not create '{CONFIG_FILE}'.")
         # Return default data even if created
         # Need to update the returned dict with ALL defaults
@@ -156,7 +199,7 @@ def load_config():
         return created_default_config, config_data
 
     # --- If config exists, read it --- #
-    try: config.read(CONFIG_FILE)
+    try: config = _get_config()
     except configparser.Error as e: print(f"ERROR: Error reading config file: {e}"); raise ValueError(f"Error reading config: {e}") from e
 
     paths_valid = True
@@ -186,7 +229,7 @@ def load_config():
         config_data['launch_minimized'] = False
         config_data['start_stop_with_osu'] = False
 
-    _logger = setup_logging() # Setup logging AFTER reading config
+    _logger = setup_logging(config) # Setup logging AFTER reading config, reusing the parsed file
 
     # Update global vars
     REPLAYS_FOLDER = config_data['replays_folder']
@@ -254,7 +297,7 @@ def save_settings(replays_folder, songs_folder, osu_db_path, log_level, time_off
     # Save to config file
     config = configparser.ConfigParser()
     if os.path.exists(CONFIG_FILE):
-        try: config.read(CONFIG_FILE)
+        try: config = _get_config() # Mutated in place; the cache is cleared once written
         except Exception as e: logger.error(f"Error reading config file before saving: {e}")
 
     if 'Paths' not in config: config['Paths'] = {}
@@ -273,9 +316,11 @@ def save_settings(replays_folder, songs_folder, osu_db_path, log_level, time_off
     try:
         os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
         with open(CONFIG_FILE, 'w') as cf: config.write(cf)
+        _read_config.cache_clear()
 
         # --- Update global variables --- #
         need_reload_db = OSU_DB_PATH != osu_db_path
+        if SONGS_FOLDER != songs_folder: _resolve_map_cached.cache_clear() # Cached map paths point into the old Songs folder
         path_changed = REPLAYS_FOLDER != replays_folder # Need to know if monitor path changed
         REPLAYS_FOLDER = replays_folder
         SONGS_FOLDER = songs_folder
@@ -283,7 +328,7 @@ def save_settings(replays_folder, songs_folder, osu_db_path, log_level, time_off
         MANUAL_REPLAY_OFFSET_MS = time_offset
 
         # Reload logging
-        setup_logging()
+        setup_logging(config)
 
         # Reload database if path changed (should be handled by caller?)
         if need_reload_db:
@@ -300,200 +345,495 @@ def save_settings(replays_folder, songs_folder, osu_db_path, log_level, time_off
         return True, path_changed
 
     except Exception as e:
+        _read_config.cache_clear() # Drop the in-memory edits that never reached disk
         logger.error(f"Error saving settings: {e}")
         return False, f"Failed to write settings file: {e}"
 
+# --- Parsed osu!.db Cache (pickle, keyed by path, mtime and size) ---
+# Parsing osu!.db with construct takes seconds for large libraries; unpickling the result is ~20x faster
+_OSU_DB_CACHE_VERSION = 2 # Bump when the cached structure changes
+
+# Only the fields the lookups read. The parsed construct Containers also reference the raw file
+# through _io, so keeping (or pickling) them keeps a second copy of the whole osu!.db around
+_OsuDb = namedtuple('_OsuDb', 'beatmaps')
+_OsuDbEntry = namedtuple('_OsuDbEntry', 'md5_hash folder_name osu_file_name overall_difficulty star_rating_osu')
+_OsuDbStarRating = namedtuple('_OsuDbStarRating', 'mods rating')
+
+def _slim_osu_db(db):
+    return _OsuDb([_OsuDbEntry(entry.md5_hash, entry.folder_name, entry.osu_file_name, entry.overall_difficulty,
+                               tuple(_OsuDbStarRating(pair.mods, pair.rating) for pair in entry.star_rating_osu or ()))
+                   for entry in db.beatmaps])
+
+def _load_osu_db_cache(cache_key):
+    try:
+        with open(OSU_DB_CACHE_FILE, 'rb', buffering=0) as f: cached = pickle.loads(f.readall())
+        if cached.get('key') == cache_key: return cached['db']
+    except FileNotFoundError: pass
+    except Exception as e: logger.warning(f"Ignoring unreadable osu!.db cache ({OSU_DB_CACHE_FILE}): {e}")
+    return None
+
+def _save_osu_db_cache(cache_key, db):
+    temp_path = OSU_DB_CACHE_FILE + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f: pickle.dump({'key': cache_key, 'db': db}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, OSU_DB_CACHE_FILE) # Never leave a half-written cache behind
+    except Exception as e: logger.warning(f"Could not write osu!.db cache ({OSU_DB_CACHE_FILE}): {e}")
+
 # --- Load osu!.db ---
 def load_osu_database(db_path):
-    global OSU_DB # Ensure we modify the global OSU_DB
+    global OSU_DB, _OSU_DB_HASH_DICT # Ensure we modify the global OSU_DB
     logger.info(f"Loading osu!.db from: {db_path}...")
     start_time = time.time()
     try:
-        OSU_DB = osu_db.parse_file(db_path) # Assign to global
+        stat = os.stat(db_path)
+        cache_key = (_OSU_DB_CACHE_VERSION, os.path.abspath(db_path), stat.st_mtime_ns, stat.st_size)
+        loaded_db = _load_osu_db_cache(cache_key)
+        if loaded_db is None:
+            with open(db_path, 'rb', buffering=0) as f: raw = f.readall() # One sequential read instead of 8 KiB refills per field
+            loaded_db = _slim_osu_db(osu_db.parse(raw)); del raw # Only now is raw actually freed
+            _save_osu_db_cache(cache_key, loaded_db)
+        else: logger.info("osu!.db is unchanged; using the cached parse.")
+        _OSU_DB_LOCK.lock() # Lookups may be running on the analysis stage pool
+        try:
+            OSU_DB = loaded_db # Assign to global
+            _OSU_DB_HASH_DICT = None # Rebuilt from the new entries if the fallback is needed
+            _update_beatmap_index(loaded_db, db_path)
+            _resolve_map_cached.cache_clear() # Cached map lookups refer to the old database
+        finally: _OSU_DB_LOCK.unlock()
         logger.info(f"osu!.db loaded successfully in {time.time() - start_time:.2f} seconds.")
         return OSU_DB # Return the loaded data
     except Exception as e:
-        logger.critical(f"FATAL: Failed to load/parse osu!.db: {e}")
-        traceback.print_exc()
+        logger.critical(f"FATAL: Failed to load/parse osu!.db: {e}", exc_info=True)
         # Don't sys.exit here, let the GUI handle it
         raise RuntimeError(f"Failed to load osu!.db: {e}") from e # Raise exception for GUI
 
+# --- Beatmap Hash Index (sqlite, rebuilt only when osu!.db changes) ---
+_BEATMAP_INDEX = None # sqlite3 connection; all use is serialized by _OSU_DB_LOCK
+_BEATMAP_INDEX_READY = False # False -> lookups fall back to the in-memory dict below
+_OSU_DB_HASH_DICT = None # 16-byte md5 digest -> first osu!.db entry; built on first fallback lookup
+
+_ENTRY_LOCATION_FIELDS = operator.attrgetter('folder_name', 'osu_file_name', 'overall_difficulty') # Every parsed osu!.db entry has these
+
+def _nomod_star_rating(beatmap_entry):
+    for sr_entry in getattr(beatmap_entry, 'star_rating_osu', None) or ():
+        if getattr(sr_entry, 'mods', None) == 0: return getattr(sr_entry, 'rating', None)
+    return None
+
+def _update_beatmap_index(db, db_path):
+    """Fills the hash -> (folder, file, OD, SR) table from a parsed osu!.db, unless it was
+       already built from this exact osu!.db (same path and mtime). Call with _OSU_DB_LOCK held.
+    """
+    global _BEATMAP_INDEX, _BEATMAP_INDEX_READY
+    _BEATMAP_INDEX_READY = False
+    try:
+        if _BEATMAP_INDEX is None:
+            _BEATMAP_INDEX = sqlite3.connect(BEATMAP_INDEX_FILE, check_same_thread=False) # Used from the stage pool too
+            with _BEATMAP_INDEX:
+                _BEATMAP_INDEX.execute("CREATE TABLE IF NOT EXISTS beatmap_cache (hash TEXT NOT NULL, folder_name TEXT, osu_file_name TEXT, od REAL, sr REAL)")
+                _BEATMAP_INDEX.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_hash ON beatmap_cache(hash)")
+                _BEATMAP_INDEX.execute("CREATE TABLE IF NOT EXISTS index_source (key TEXT PRIMARY KEY, value TEXT)")
+        source = {'db_path': os.path.abspath(db_path), 'db_mtime_ns': str(os.stat(db_path).st_mtime_ns)}
+        if dict(_BEATMAP_INDEX.execute("SELECT key, value FROM index_source")) == source:
+            logger.info("Beatmap hash index is up to date."); _BEATMAP_INDEX_READY = True; return
+
+        start_time = time.time()
+        rows = {}
+        for beatmap_entry in db.beatmaps:
+            entry_hash = getattr(beatmap_entry, 'md5_hash', None)
+            if not entry_hash or entry_hash.lower() in rows: continue # First entry wins, like the old linear scan
+            od, star_rating = getattr(beatmap_entry, 'overall_difficulty', None), _nomod_star_rating(beatmap_entry)
+            rows[entry_hash.lower()] = (getattr(beatmap_entry, 'folder_name', None), getattr(beatmap_entry, 'osu_file_name', None),
+                                        float(od) if od is not None else None, float(star_rating) if star_rating is not None else None)
+        with _BEATMAP_INDEX: # One transaction for the whole rebuild
+            _BEATMAP_INDEX.execute("DELETE FROM beatmap_cache")
+            _BEATMAP_INDEX.executemany("INSERT INTO beatmap_cache (hash, folder_name, osu_file_name, od, sr) VALUES (?, ?, ?, ?, ?)",
+                                       ((entry_hash,) + row for entry_hash, row in rows.items()))
+            _BEATMAP_INDEX.execute("DELETE FROM index_source")
+            _BEATMAP_INDEX.executemany("INSERT INTO index_source (key, value) VALUES (?, ?)", source.items())
+        _BEATMAP_INDEX_READY = True
+        logger.info(f"Beatmap hash index rebuilt with {len(rows)} entries in {time.time() - start_time:.2f} seconds.")
+    except Exception as e:
+        logger.error(f"Could not build beatmap hash index, falling back to scanning osu!.db: {e}", exc_info=True)
+
 # --- Beatmap Lookup (Uses global OSU_DB, SONGS_FOLDER) ---
 def lookup_beatmap_in_db(beatmap_hash):
-    # Keep this function largely as is, using global OSU_DB
-    if OSU_DB is None: return None, None, None
-    logger.info(f"Searching osu!.db for beatmap with hash: {beatmap_hash}...")
-    found_entry = None
+    # Serialized against load_osu_database swapping OSU_DB out from under the scan
+    _OSU_DB_LOCK.lock()
     try:
-        if not hasattr(OSU_DB, 'beatmaps'): return None, None, None
-        for beatmap_entry in OSU_DB.beatmaps:
-            try:
-                entry_hash = beatmap_entry.md5_hash
-                if entry_hash and entry_hash.lower() == beatmap_hash.lower(): found_entry = beatmap_entry; break
-            except AttributeError: continue
+        if _BEATMAP_INDEX_READY: return _lookup_beatmap_in_index(beatmap_hash)
+        return _lookup_beatmap_in_db(beatmap_hash)
+    finally: _OSU_DB_LOCK.unlock()
+
+def _lookup_beatmap_in_index(beatmap_hash):
+    logger.info(f"Looking up beatmap hash in index: {beatmap_hash}...")
+    try:
+        row = _BEATMAP_INDEX.execute("SELECT folder_name, osu_file_name, od, sr FROM beatmap_cache WHERE hash = ?", (beatmap_hash.lower(),)).fetchone()
+    except Exception as e: logger.error(f"Error looking up hash {beatmap_hash} in index: {e}", exc_info=True); return _lookup_beatmap_in_db(beatmap_hash)
+    if row is None: logger.warning(f"Beatmap hash {beatmap_hash} not found in osu!.db."); return None, None, None
+    folder_name, osu_filename, od, star_rating = row
+    if star_rating is None: logger.warning(f"Could not find NoMod SR for hash {beatmap_hash}")
+    return _beatmap_location(beatmap_hash, folder_name, osu_filename, od, star_rating)
+
+def _beatmap_location(beatmap_hash, folder_name, osu_filename, od, star_rating):
+    """Turns a found osu!.db entry into (map_path, od, sr), or Nones if the .osu file is missing."""
+    if folder_name and osu_filename:
+        logger.info(f"Found beatmap entry: {folder_name}\\{osu_filename}")
+        full_map_path = os.path.join(SONGS_FOLDER, folder_name, osu_filename)
+        logger.info(f"  Constructed Path: {full_map_path}")
+        logger.info(f"  Overall Difficulty (OD): {od}")
+        logger.info(f"  Star Rating (NoMod): {star_rating if star_rating is not None else 'N/A'}")
+        if os.path.isfile(full_map_path):
+            return full_map_path, float(od) if od is not None else None, float(star_rating) if star_rating is not None else None
+        else: logger.warning(f"DB entry found but file missing: {full_map_path}"); return None, None, None
+    else: logger.warning(f"DB entry for hash {beatmap_hash} missing path info."); return None, None, None
+
+def _lookup_beatmap_in_db(beatmap_hash):
+    # Dict lookup on OSU_DB; only used when the hash index is unavailable. Call with _OSU_DB_LOCK held
+    global _OSU_DB_HASH_DICT
+    if OSU_DB is None or not hasattr(OSU_DB, 'beatmaps'): return None, None, None
+    try:
+        if _OSU_DB_HASH_DICT is None:
+            logger.info("Building in-memory beatmap hash lookup from osu!.db...")
+            hash_dict = {}
+            for beatmap_entry in OSU_DB.beatmaps:
+                entry_hash = getattr(beatmap_entry, 'md5_hash', None)
+                if not entry_hash: continue
+                try: hash_dict.setdefault(bytes.fromhex(entry_hash), beatmap_entry) # First entry wins, like the old linear scan
+                except ValueError: continue # Not a hex MD5; no replay can reference it
+            _OSU_DB_HASH_DICT = hash_dict
+        try: found_entry = _OSU_DB_HASH_DICT.get(bytes.fromhex(beatmap_hash))
+        except ValueError: found_entry = None
         if found_entry:
-            folder_name, osu_filename, od, star_rating = None, None, None, None
-            try:
-                folder_name = found_entry.folder_name
-                osu_filename = found_entry.osu_file_name
-                od = found_entry.overall_difficulty
-                if hasattr(found_entry, 'star_rating_osu'):
-                    sr_osu = found_entry.star_rating_osu
-                    if sr_osu and hasattr(sr_osu, '__iter__'):
-                        for sr_entry in sr_osu:
-                            if hasattr(sr_entry, 'mods') and sr_entry.mods == 0:
-                                if hasattr(sr_entry, 'rating'):
-                                    star_rating = sr_entry.rating
-                                    logger.info(f"Found NoMod SR in star_rating_osu: {star_rating}")
-                                    break
-                if star_rating is None: logger.warning(f"Could not find NoMod SR for hash {beatmap_hash}")
-                if folder_name and osu_filename:
-                    logger.info(f"Found beatmap entry: {folder_name}\\{osu_filename}")
-                    full_map_path = os.path.join(SONGS_FOLDER, folder_name, osu_filename)
-                    logger.info(f"  Constructed Path: {full_map_path}")
-                    logger.info(f"  Overall Difficulty (OD): {od}")
-                    logger.info(f"  Star Rating (NoMod): {star_rating if star_rating is not None else 'N/A'}")
-                    if os.path.isfile(full_map_path):
-                        return full_map_path, float(od) if od is not None else None, float(star_rating) if star_rating is not None else None
-                    else: logger.warning(f"DB entry found but file missing: {full_map_path}"); return None, None, None
-                else: logger.warning(f"DB entry for hash {beatmap_hash} missing path info."); return None, None, None
-            except AttributeError as ae: logger.warning(f"DB entry for hash {beatmap_hash} missing attribute ({ae})."); return None, None, None
+            star_rating = _nomod_star_rating(found_entry)
+            if star_rating is None: logger.warning(f"Could not find NoMod SR for hash {beatmap_hash}")
+            return _beatmap_location(beatmap_hash, *_ENTRY_LOCATION_FIELDS(found_entry), star_rating)
         else: logger.warning(f"Beatmap hash {beatmap_hash} not found in osu!.db."); return None, None, None
-    except Exception as e: logger.error(f"Error looking up hash {beatmap_hash}: {e}"); traceback.print_exc(); return None, None, None
-
-# --- .osu File Parsing (Uses BeatmapParser) ---
-def parse_osu_file(map_path):
-    # Keep this function as is
-    logger.info(f"Parsing beatmap: {os.path.basename(map_path)} using BeatmapParser...")
-    star_rating = None
+    except Exception as e: logger.error(f"Error looking up hash {beatmap_hash}: {e}", exc_info=True); return None, None, None
+
+# --- .osu Difficulty Patterns (bytes, searched on the raw file contents) ---
+_DIFF_RE = re.compile(rb'(HPDrainRate|CircleSize|OverallDifficulty|ApproachRate):([0-9.]+)') # One pass for all four
+_STAR_RATING_RE = re.compile(rb'StarRating:([0-9.]+)')
+_OVERALL_DIFFICULTY_RE = re.compile(rb'OverallDifficulty:([0-9.]+)')
+
+# --- .osu File Parsing ---
+def _parse_osu_fast(content):
+    """Extracts only what the analysis reads: the "key: value" header fields and each hit object's
+       startTime/object_name, in the dict shape the old BeatmapParser produced. Slider paths,
+       per-slider timing point lookups and combo counting are skipped.
+    """
+    beatmap, hit_objects, section = {}, [], None
+    for line in content.splitlines():
+        line = line.strip()
+        if not line: continue
+        if line[0] == '[' and line[-1] == ']': section = line[1:-1].lower(); continue
+        if section == 'hitobjects':
+            members = line.split(',', 4) # x, y, time, type, rest
+            try: start_time, object_type = int(members[2]), int(members[3])
+            except (IndexError, ValueError): continue
+            # Same precedence as the old BeatmapParser: circle, spinner, slider
+            object_name = 'circle' if object_type & 1 else ('spinner' if object_type & 8 else ('slider' if object_type & 2 else 'unknown'))
+            hit_objects.append({'startTime': start_time, 'object_name': object_name})
+        elif section not in ('timingpoints', 'events'):
+            key, sep, value = line.partition(':')
+            key, value = key.rstrip(), value.strip()
+            if sep and value and key.isalnum(): beatmap[key] = value
+    hit_objects.sort(key=operator.itemgetter('startTime')) # Like the old BeatmapParser; correlation searchsorts these times
+    beatmap['hitObjects'] = hit_objects
+    return beatmap
+
+def parse_osu_file(map_path, return_difficulty=False):
+    """Parses a .osu file, reusing the cached result if the file is unchanged. With return_difficulty=True,
+       returns (beatmap_data, difficulty_values) where difficulty_values are the HP/CS/OD/AR floats
+       found in [Difficulty], so callers don't need a second read for the SR estimate.
+    """
+    try: stat = os.stat(map_path)
+    except OSError as e: logger.error(f"Error reading .osu file {os.path.basename(map_path)}: {e}"); return (None, []) if return_difficulty else None
+    try: beatmap_data, difficulty_values = _parse_osu_cached(map_path, stat.st_mtime_ns, stat.st_size)
+    except _ParseFailed as e: beatmap_data, difficulty_values = e.args[0] # Not cached; the next call reads the file again
+    return (beatmap_data, difficulty_values) if return_difficulty else beatmap_data
+
+class _ParseFailed(Exception):
+    """Raised by the cached parsers so lru_cache doesn't keep failed parses; args[0] is the result to return."""
+
+@functools.lru_cache(maxsize=64)
+def _parse_osu_cached(map_path, mtime_ns, size):
+    # mtime/size are only part of the cache key; the returned dict is shared, don't mutate it
+    logger.info(f"Parsing beatmap: {os.path.basename(map_path)}...")
+    star_rating = None; difficulty_values = []
     try:
-        with open(map_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            difficulty_section = re.search(r'\[Difficulty\](.*?)(?:\[|$)', content, re.DOTALL)
-            if difficulty_section:
-                difficulty_text = difficulty_section.group(1)
-                sr_match = re.search(r'StarRating:([0-9\.]+)', difficulty_text)
-                if not sr_match: sr_match = re.search(r'OverallDifficulty:([0-9\.]+)', difficulty_text)
-                if sr_match: star_rating = float(sr_match.group(1)); logger.info(f"Found star rating in .osu file: {star_rating}")
-        parser = BeatmapParser()
-        with open(map_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f: parser.read_line(line)
-        parser.build_beatmap()
-        beatmap_data = parser.beatmap
+        with open(map_path, 'rb', buffering=0) as f: raw = f.readall() # One-shot read; no BufferedReader in between
+        _, found, tail = raw.partition(b'[Difficulty]')
+        if found:
+            difficulty_section = tail.partition(b'\n[')[0]; del tail # Up to the next section header, not any '['
+            difficulty_values = [float(match.group(2)) for match in _DIFF_RE.finditer(difficulty_section)]
+            sr_match = _STAR_RATING_RE.search(difficulty_section) or _OVERALL_DIFFICULTY_RE.search(difficulty_section)
+            if sr_match: star_rating = float(sr_match.group(1)); logger.info(f"Found star rating in .osu file: {star_rating}")
+        content = raw.decode('utf-8', errors='ignore'); del raw
+        beatmap_data = _parse_osu_fast(content); del content
         if star_rating is not None: beatmap_data['star_rating'] = star_rating
-        logger.info("Beatmap parsed successfully with BeatmapParser.")
-        return beatmap_data
-    except Exception as e: logger.error(f"Error parsing .osu file {os.path.basename(map_path)}: {e}"); traceback.print_exc(); return None
+        get_hit_times_ms(beatmap_data) # Precompute once so every correlation of this map reuses it
+        logger.info(f"Beatmap parsed successfully ({len(beatmap_data['hitObjects'])} hit objects).")
+        return beatmap_data, difficulty_values
+    except Exception as e:
+        logger.error(f"Error parsing .osu file {os.path.basename(map_path)}: {e}", exc_info=True)
+        raise _ParseFailed((None, difficulty_values))
+
+def get_hit_times_ms(beatmap_data):
+    """Returns the start times of all circles and sliders as a float array.
+       Computed once and cached on beatmap_data under '_hit_times_ms'.
+    """
+    hit_times = beatmap_data.get('_hit_times_ms')
+    if hit_times is None:
+        hit_times = np.fromiter((obj['startTime'] for obj in beatmap_data.get('hitObjects', [])
+                                 if obj.get('object_name') in ('circle', 'slider') and obj.get('startTime') is not None), dtype=np.float64)
+        beatmap_data['_hit_times_ms'] = hit_times
+    return hit_times
 
 # --- Replay Parsing (Uses global MANUAL_REPLAY_OFFSET_MS) ---
 def parse_replay_file(replay_path):
-    # Keep this function as is
+    """Parses a replay, reusing the cached result if the file is unchanged.
+       Watchdog can fire several events for one replay, so the cache makes repeats free.
+    """
+    try: stat = os.stat(replay_path)
+    except OSError as e: logger.error(f"Error reading replay {os.path.basename(replay_path)}: {e}"); return None
+    try: return _parse_replay_cached(replay_path, stat.st_mtime_ns, stat.st_size, MANUAL_REPLAY_OFFSET_MS)
+    except _ParseFailed as e: return e.args[0] # Not cached; the next event for this replay tries again
+
+@functools.lru_cache(maxsize=32)
+def _parse_replay_cached(replay_path, mtime_ns, size, time_offset_ms):
+    # mtime/size/offset are only part of the cache key; the returned dict is shared, don't mutate it
     try:
         logger.info(f"Parsing replay: {os.path.basename(replay_path)}...")
-        replay = Replay.from_path(replay_path)
-        if replay.mode != GameMode.STD: logger.warning(f"Skipping non-standard replay: {replay.mode}"); return None
-        beatmap_hash, mods_enum, replay_events, score = replay.beatmap_hash, replay.mods, replay.replay_data, replay.score
+        with open(replay_path, 'rb', buffering=0) as f: raw = f.readall()
+        # The game mode is the first byte of an .osr; check it before paying for the LZMA decode
+        if not raw: logger.warning("Replay file is empty."); return None
+        if raw[0] != GameMode.STD.value: logger.warning(f"Skipping non-standard replay: {GameMode(raw[0])}"); return None
+        try: beatmap_hash, mods_enum, score, deltas, keys = _decode_replay(raw)
+        except Exception as e:
+            logger.warning(f"Direct replay decode failed ({e}); falling back to osrparse.")
+            beatmap_hash, mods_enum, score, deltas, keys = _decode_replay_osrparse(raw)
+        del raw
         logger.info(f"  Beatmap Hash: {beatmap_hash}"); logger.info(f"  Mods: {mods_enum}"); logger.info(f"  Score: {score}")
-        input_actions, current_time = [], 0
-        relevant_keys_mask = Key.M1 | Key.M2 | Key.K1 | Key.K2
-        for idx, event in enumerate(replay_events):
-            if event.time_delta < 0 and current_time == 0: logger.debug(f"Skipping initial negative time_delta: {event.time_delta}"); continue
-            logger.debug(f"  Replay Frame {idx}: time_delta={event.time_delta}, current_keys={event.keys}")
-            current_time += event.time_delta
-            current_press_state = event.keys & relevant_keys_mask
-            if current_press_state > 0:
-                adjusted_input_time = current_time + MANUAL_REPLAY_OFFSET_MS
-                input_actions.append({'time': adjusted_input_time, 'keys': current_press_state, 'original_time': current_time})
-                logger.debug(f"    -> Input State Recorded: Frame={idx}, OrigTime={current_time}, AdjTime={adjusted_input_time}, Offset={MANUAL_REPLAY_OFFSET_MS}, KeysDown={current_press_state}")
-        logger.info(f"  Found {len(input_actions)} input state frames (key/mouse down).")
-        if not input_actions: logger.warning("No input actions found."); return None
-        return {'beatmap_hash': beatmap_hash, 'mods': mods_enum, 'input_actions': input_actions, 'score': score}
-    except Exception as e: logger.error(f"Error parsing replay {os.path.basename(replay_path)}: {e}"); traceback.print_exc(); return None
+        relevant_keys_mask = np.uint8(Key.M1 | Key.M2 | Key.K1 | Key.K2)
+        frame_count = deltas.size
+        # Negative deltas are only skipped while the clock is still at zero, i.e. before the first positive delta
+        keep = (deltas >= 0) | np.logical_or.accumulate(deltas > 0)
+        logger.debug("Skipping %d initial negative time_delta frames", frame_count - np.count_nonzero(keep))
+        times = np.cumsum(deltas[keep])
+        relevant = keys[keep] & relevant_keys_mask
+        press_mask = relevant.astype(bool) # Any relevant key/mouse button down
+        # Parallel arrays instead of one dict per input; original times are input_times - time_offset_ms
+        input_times = times[press_mask].astype(np.float64) + time_offset_ms
+        input_keys = relevant[press_mask]
+        logger.info(f"  Found {input_times.size} input state frames (key/mouse down).")
+        if not input_times.size: logger.warning("No input actions found."); return None
+        return {'beatmap_hash': beatmap_hash, 'mods': mods_enum, 'input_times': input_times, 'input_keys': input_keys, 'score': score}
+    except Exception as e: logger.error(f"Error parsing replay {os.path.basename(replay_path)}: {e}", exc_info=True); raise _ParseFailed(None)
+
+_RNG_SEED_DELTA = -12345 # Time delta of the trailing frame that carries the RNG seed instead of input
+
+def _decode_replay(raw):
+    """Reads the header fields and frame deltas/keys of an .osr straight into numpy arrays,
+       without building one osrparse ReplayEvent per frame. Drops the same frames osrparse does:
+       the trailing RNG seed frame and the (256, -500) placeholders among the first two.
+    """
+    replay = osr_replay.parse(raw)
+    frame_text = lzma.decompress(replay.replay_data, format=lzma.FORMAT_AUTO).rstrip(b',')
+    fields = np.array(frame_text.replace(b'|', b',').split(b','), dtype=np.float64).reshape(-1, 4) # w|x|y|z per frame
+    keep = np.ones(len(fields), dtype=bool)
+    if len(fields) and fields[-1, 0] == _RNG_SEED_DELTA: keep[-1] = False
+    keep[:2] &= ~((fields[:2, 1] == 256) & (fields[:2, 2] == -500))
+    frames = fields[keep]
+    return replay.beatmap_hash, Mod(replay.mods), replay.score, frames[:, 0].astype(np.int64), frames[:, 3].astype(np.int64).astype(np.uint8)
+
+def _decode_replay_osrparse(raw):
+    replay = Replay.from_string(raw)
+    replay_events, frame_count = replay.replay_data, len(replay.replay_data)
+    deltas = np.fromiter((event.time_delta for event in replay_events), dtype=np.int64, count=frame_count)
+    keys = np.fromiter((event.keys for event in replay_events), dtype=np.uint8, count=frame_count)
+    return replay.beatmap_hash, replay.mods, replay.score, deltas, keys
 
 # --- Hit Window Calculation ---
-def get_hit_window_ms(od, window_type='50', mods=Mod.NoMod):
-    # Keep this function as is
-    base_ms = {'300': 79.5, '100': 139.5, '50': 199.5}
-    ms_reduction_per_od = {'300': 6, '100': 8, '50': 10}
-    if window_type not in base_ms: raise ValueError("Invalid window_type.")
+WINDOW_300, WINDOW_100, WINDOW_50 = 0, 1, 2 # Indices into the tables below
+_HIT_WINDOW_BASE_MS = (79.5, 139.5, 199.5)
+_HIT_WINDOW_REDUCTION_PER_OD = (6.0, 8.0, 10.0)
+
+_SPEED_UP_MODS, _SLOW_DOWN_MODS = int(Mod.DoubleTime | Mod.Nightcore), int(Mod.HalfTime) # Plain ints, no IntFlag ops per test
+
+def _mod_rate(mods):
+    """Playback rate implied by the mods: 1.5 for DT/NC, 0.75 for HT, else 1.0."""
+    mods = int(mods)
+    return 1.5 if mods & _SPEED_UP_MODS else (0.75 if mods & _SLOW_DOWN_MODS else 1.0)
+
+def get_hit_window_ms(od, window=WINDOW_50, mods=Mod.NoMod, rate=None):
+    """Returns the +/- hit window in ms for the given OD, window index and mods.
+       Pass rate if the caller already has it from _mod_rate.
+    """
     try: od_float = float(od)
     except (ValueError, TypeError): od_float = 5.0
-    window = base_ms[window_type] - ms_reduction_per_od[window_type] * od_float
-    rate = 1.0
-    if Mod.DoubleTime in mods or Mod.Nightcore in mods: rate = 1.5
-    elif Mod.HalfTime in mods: rate = 0.75
-    return max(0, window / rate)
+    if rate is None: rate = _mod_rate(mods)
+    return _hit_window_ms(od_float, window, rate)
+
+@functools.lru_cache(maxsize=256)
+def _hit_window_ms(od_float, window, rate):
+    return max(0, (_HIT_WINDOW_BASE_MS[window] - _HIT_WINDOW_REDUCTION_PER_OD[window] * od_float) / rate)
 
 # --- Correlation Logic ---
-def correlate_inputs_and_calculate_offsets(input_actions, beatmap_data, beatmap_od, mods):
-    # Keep this function as is
-    if not beatmap_data or beatmap_od is None or not input_actions: return []
-    hit_offsets, used_input_indices = [], set()
+def correlate_inputs_and_calculate_offsets(input_times, input_keys, beatmap_data, beatmap_od, mods, return_stats=False):
+    # input_times/input_keys are the parallel arrays from parse_replay_file
+    # With return_stats=True, also returns the running (count, mean, M2) gathered while matching
+    hit_offsets, offset_stats = _correlate_offsets(input_times, input_keys, beatmap_data, beatmap_od, mods)
+    return (hit_offsets, offset_stats) if return_stats else hit_offsets
+
+def _correlate_offsets(input_times, input_keys, beatmap_data, beatmap_od, mods):
+    no_hits = np.empty(0), (0, 0.0, 0.0)
+    if not beatmap_data or beatmap_od is None or input_times is None or not input_times.size: return no_hits
+    hit_offsets = np.empty(0)
+    hit_count, offset_mean, offset_m2 = 0, 0.0, 0.0 # Welford's online mean/variance
     last_successful_input_index = -1
-    rate = 1.0
-    if Mod.DoubleTime in mods or Mod.Nightcore in mods: rate = 1.5
-    elif Mod.HalfTime in mods: rate = 0.75
+    rate = _mod_rate(mods) # Computed once and shared with the window calculation
     try:
-        od = beatmap_od; miss_window_ms = get_hit_window_ms(od, '50', mods)
+        od = beatmap_od; miss_window_ms = get_hit_window_ms(od, WINDOW_50, mods, rate=rate)
         logger.info(f"Using miss window (OD50): ±{miss_window_ms:.2f} ms (OD={od}, Mods={mods})")
     except Exception as e: logger.error(f"Error calculating miss window: {e}. Using default 200ms."); miss_window_ms = 200
     try:
         beatmap_objects = beatmap_data.get('hitObjects', [])
-        if not beatmap_objects: logger.warning("Beatmap data contains no 'hitObjects'."); return []
-        logger.info(f"Correlating {len(input_actions)} inputs with {len(beatmap_objects)} beatmap objects...")
-        objects_correlated, skipped_object_count = 0, 0
-        for obj_index, obj in enumerate(beatmap_objects):
-            obj_type = obj.get('object_name')
-            if obj_type not in ['circle', 'slider']: logger.debug(f"  -> Skipping HO {obj_index} (Type: {obj_type})"); skipped_object_count += 1; continue
-            expected_hit_time_ms = obj.get('startTime')
-            if expected_hit_time_ms is None: logger.warning(f"Skipping HO {obj_index} missing 'startTime'"); continue
-            adjusted_expected_hit_time = expected_hit_time_ms / rate
-            window_start, window_end = adjusted_expected_hit_time - miss_window_ms, adjusted_expected_hit_time + miss_window_ms
-            best_match_input_index, min_abs_offset = -1, float('inf')
-            current_search_start_index = last_successful_input_index + 1
-            logger.debug(f" --> Correlating HO {obj_index} (Type:{obj_type}, AdjTime:{adjusted_expected_hit_time:.0f}ms), Window=[{window_start:.0f}ms, {window_end:.0f}ms], Searching inputs from index {current_search_start_index}...")
-            found_potential_match_in_window = False
-            for i in range(current_search_start_index, len(input_actions)):
-                action = input_actions[i]; input_time_ms = action['time']
-                logger.debug(f"    -> Checking Input {i} @ {input_time_ms:.0f}ms (Used: {i in used_input_indices})")
-                if input_time_ms > window_end: logger.debug(f"       Input {i} too late. Stopping search."); break
-                if window_start <= input_time_ms <= window_end:
-                    found_potential_match_in_window = True
-                    if i not in used_input_indices:
-                        current_offset = input_time_ms - adjusted_expected_hit_time; current_abs_offset = abs(current_offset)
-                        if current_abs_offset < min_abs_offset:
-                            min_abs_offset = current_abs_offset; best_match_input_index = i
-                            logger.debug(f"       Potential Best Match Found! Input {i} (Offset:{current_offset:+.2f}ms)")
-                    else: logger.debug(f"       Input {i} within window but used.")
+        if not beatmap_objects: logger.warning("Beatmap data contains no 'hitObjects'."); return no_hits
+        adjusted_hit_times = get_hit_times_ms(beatmap_data) / rate # One vectorized divide instead of per-object dict access
+        logger.info(f"Correlating {input_times.size} inputs with {len(beatmap_objects)} beatmap objects...")
+        objects_correlated, skipped_object_count = 0, len(beatmap_objects) - len(adjusted_hit_times)
+        hit_offsets = np.empty(adjusted_hit_times.size) # At most one offset per object; trimmed to hit_count at the end
+        window_starts = np.searchsorted(input_times, adjusted_hit_times - miss_window_ms).tolist() # First input inside each window
+        window_ends = np.searchsorted(input_times, adjusted_hit_times + miss_window_ms, side='right').tolist() # One past the last
+        nearest_inputs = np.searchsorted(input_times, adjusted_hit_times).tolist() # First input at or after each hit time
+        input_times_list = input_times.tolist() # Python floats for the scalar loop below
+        _debug = logger.isEnabledFor(logging.DEBUG) # Checked once; the loops below are hot
+        for obj_index, adjusted_expected_hit_time in enumerate(adjusted_hit_times.tolist()):
+            best_match_input_index = -1
+            # Jump straight to the first input inside the window instead of walking up from the last match
+            current_search_start_index = max(last_successful_input_index + 1, window_starts[obj_index])
+            current_search_end_index = window_ends[obj_index] # Every input in [start, end) lies inside the window
+            if _debug: logger.debug(" --> Correlating HO %d (AdjTime:%.0fms), Window=[%.0fms, %.0fms], Searching inputs %d..%d", obj_index, adjusted_expected_hit_time, adjusted_expected_hit_time - miss_window_ms, adjusted_expected_hit_time + miss_window_ms, current_search_start_index, current_search_end_index)
+            if current_search_start_index < current_search_end_index:
+                # Matches only move forward, so nothing past the last match is used yet and the closest input is
+                # one of the two around the hit time; ties go to the earlier input, as a linear scan would pick
+                i = min(max(nearest_inputs[obj_index], current_search_start_index), current_search_end_index - 1)
+                if i > current_search_start_index and adjusted_expected_hit_time - input_times_list[i - 1] <= input_times_list[i] - adjusted_expected_hit_time: i -= 1
+                best_match_input_index = bisect.bisect_left(input_times_list, input_times_list[i], current_search_start_index, i) # First of equal times
             if best_match_input_index != -1:
-                matched_input_time_ms = input_actions[best_match_input_index]['time']
+                matched_input_time_ms = input_times_list[best_match_input_index]
                 offset = matched_input_time_ms - adjusted_expected_hit_time
                 if abs(offset) <= miss_window_ms:
-                    hit_offsets.append(offset); used_input_indices.add(best_match_input_index); objects_correlated += 1
+                    hit_offsets[hit_count] = offset; objects_correlated += 1
                     last_successful_input_index = best_match_input_index
-                    logger.debug(f"  --> SUCCESS: Matched HO {obj_index} with Input {best_match_input_index}. Offset: {offset:+.2f}. Last used index: {last_successful_input_index}")
-                else: logger.warning(f"  --> REJECTED MATCH HO {obj_index}: Offset {offset:+.2f} outside window.")
-            else:
-                if found_potential_match_in_window: logger.debug(f"  --> MISS: No *unused* input found for HO {obj_index} (T={adjusted_expected_hit_time:.0f}).")
-                else: logger.debug(f"  --> MISS: No input found *at all* for HO {obj_index} (T={adjusted_expected_hit_time:.0f}).")
-        logger.info(f"Correlation complete. Matched {objects_correlated} hits. Skipped {skipped_object_count} objects. Found {len(hit_offsets)} offsets.")
-        if not hit_offsets: logger.warning("No hits correlated.")
-    except Exception as e: logger.error(f"Correlation error: {e}"); traceback.print_exc(); return []
-    return hit_offsets
+                    hit_count += 1; delta = offset - offset_mean; offset_mean += delta / hit_count; offset_m2 += delta * (offset - offset_mean)
+                    if _debug: logger.debug("  --> SUCCESS: Matched HO %d with Input %d. Offset: %+.2f. Last used index: %d", obj_index, best_match_input_index, offset, last_successful_input_index)
+                else: logger.warning("  --> REJECTED MATCH HO %d: Offset %+.2f outside window.", obj_index, offset)
+            elif _debug: logger.debug("  --> MISS: No unused input found for HO %d (T=%.0f).", obj_index, adjusted_expected_hit_time)
+        logger.info(f"Correlation complete. Matched {objects_correlated} hits. Skipped {skipped_object_count} objects. Found {hit_count} offsets.")
+        if not hit_count: logger.warning("No hits correlated.")
+    except Exception as e: logger.error(f"Correlation error: {e}", exc_info=True); return no_hits
+    return hit_offsets[:hit_count], (hit_count, offset_mean, offset_m2)
+
+# --- Persistent Star Rating Cache ---
+# Estimated SRs keyed by beatmap hash. .osu files are content-addressed by that MD5,
+# so an estimate never goes stale and survives restarts.
+def _open_sr_cache():
+    try: return shelve.open(SR_CACHE_FILE)
+    except Exception as e: print(f"WARNING: Could not open star rating cache ({SR_CACHE_FILE}): {e}"); return {}
+
+_SR_CACHE = _open_sr_cache()
+_SR_CACHE_LOCK = threading.Lock() # Map resolution runs on the analysis stage pool
+
+def close_sr_cache():
+    """Flushes and closes the persistent star rating cache. Call once on application exit."""
+    global _SR_CACHE
+    with _SR_CACHE_LOCK:
+        if hasattr(_SR_CACHE, 'close'): _SR_CACHE.close() # Plain dict fallback has nothing to close
+        _SR_CACHE = {}
+
+# --- Map Resolution (Cached per beatmap hash) ---
+class _MapNotResolved(Exception):
+    """Raised by _resolve_map_cached so lru_cache doesn't keep failed lookups; args[0] is the result tuple."""
+
+def _resolve_map(beatmap_hash):
+    """Looks up, rates and parses the beatmap for a hash. Returns (map_path, od, sr, beatmap_data).
+       Only successful resolutions are cached, so a map that is missing or unreadable now is retried next time.
+    """
+    try: return _resolve_map_cached(beatmap_hash)
+    except _MapNotResolved as e: return e.args[0]
+
+@functools.lru_cache(maxsize=256)
+def _resolve_map_cached(beatmap_hash):
+    # Cached because the same map is usually analyzed many times in a row; the cache is
+    # cleared whenever osu!.db or the Songs folder changes. beatmap_data is shared, don't mutate it.
+    map_path, od, sr = lookup_beatmap_in_db(beatmap_hash)
+    if not map_path: raise _MapNotResolved((None, None, None, None))
+    if sr is None: # Not in db; reuse an earlier estimate if there is one
+        with _SR_CACHE_LOCK: sr = _SR_CACHE.get(beatmap_hash)
+        if sr is not None: logger.info(f"Using cached star rating estimate: {sr:.2f}*")
+    beatmap_data, difficulty_values = parse_osu_file(map_path, return_difficulty=True)
+    if sr is None and len(difficulty_values) >= 2: # Rough estimate from the [Difficulty] values
+        sr = sum(difficulty_values) / len(difficulty_values) * 0.5
+        logger.info(f"Estimated star rating from .osu file: {sr:.2f}*")
+        with _SR_CACHE_LOCK: _SR_CACHE[beatmap_hash] = sr
+    if not beatmap_data: raise _MapNotResolved((map_path, od, sr, None))
+    return map_path, od, sr, beatmap_data
+
+_TENDENCIES = ("EARLY", "ON TIME", "LATE") # Indexed by how many of the +-2 ms thresholds the average passes
 
 # --- Analysis Worker (Keep as QObject for signals/slots) ---
+class _BackgroundCall(QRunnable):
+    """Runs fn(*args) on a QThreadPool thread; result() blocks until it has finished."""
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.setAutoDelete(False) # The caller keeps the Python reference and reads the result
+        self.fn, self.args = fn, args
+        self._done, self._result, self._error = threading.Event(), None, None
+
+    def run(self):
+        try: self._result = self.fn(*self.args)
+        except Exception as e: self._error = e
+        finally: self._done.set()
+
+    def wait(self):
+        self._done.wait()
+
+    def result(self):
+        self.wait()
+        if self._error is not None: raise self._error
+        return self._result
+
+_STAGE_POOL = None
+
+def _get_stage_pool():
+    """Small shared pool for analysis stages that can overlap with replay decoding."""
+    global _STAGE_POOL
+    if _STAGE_POOL is None:
+        _STAGE_POOL = QThreadPool(); _STAGE_POOL.setMaxThreadCount(2)
+    return _STAGE_POOL
+
 class AnalysisWorker(QObject):
     analysis_complete = pyqtSignal(dict) # Signal emits analysis results dictionary
     status_update = pyqtSignal(str)
     error_occurred = pyqtSignal(str)
+    analysis_finished = pyqtSignal() # Emitted after every analyze_replay call, whatever the outcome
 
-    def __init__(self, replay_path):
+    def __init__(self, replay_path=None):
         super().__init__()
         self.replay_path = replay_path
-        self._is_running = True
+        self._is_running = True # Cleared by stop(); a stopped worker skips any further replays
+
+    @pyqtSlot(str)
+    def analyze_replay(self, replay_path):
+        """Analyzes one replay on the worker's thread; lets one worker serve every replay."""
+        self.replay_path = replay_path
+        try: self.run()
+        finally: self.analysis_finished.emit()
 
     @pyqtSlot() # Explicitly mark as a slot if needed (good practice)
     def run(self):
+        map_prefetch = None
         try:
             if not self._is_running:
                 return
@@ -501,17 +841,20 @@ class AnalysisWorker(QObject):
             replay_basename = os.path.basename(self.replay_path)
             self.status_update.emit(f"Processing: {replay_basename}...")
             logger.info(f"--- Starting Analysis for {replay_basename} ---")
-            analysis_timestamp = datetime.now() # Keep timestamp for potential future use if needed
 
-            replay_data = parse_replay_file(self.replay_path)
+            # The map only depends on the hash in the replay header, so resolve it on the pool
+            # while this thread decodes the (much larger) LZMA frame stream
+            map_prefetch = self._start_map_prefetch()
+
+            replay_data = self._stage_parse_replay()
             if not replay_data:
                 logger.error("Failed to parse replay.")
                 self.status_update.emit(f"Error parsing: {replay_basename}")
                 self.error_occurred.emit(f"Failed to parse replay: {replay_basename}")
                 return
 
-            beatmap_hash, mods, input_actions, score = replay_data['beatmap_hash'], replay_data['mods'], replay_data['input_actions'], replay_data['score']
-            map_path, od_from_db, sr_from_db = lookup_beatmap_in_db(beatmap_hash)
+            beatmap_hash = replay_data['beatmap_hash']
+            map_path, od_from_db, sr_from_db, beatmap_data = self._stage_resolve_map(beatmap_hash, map_prefetch)
 
             if not map_path:
                 logger.error(f"Could not find map path for hash {beatmap_hash}.")
@@ -524,130 +867,195 @@ class AnalysisWorker(QObject):
 
             map_basename = os.path.basename(map_path)
 
-            # Try to extract star rating from .osu file if not found in db
-            if sr_from_db is None:
-                try:
-                    with open(map_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        if '[Difficulty]' in content:
-                            diff_section = content.split('[Difficulty]')[1].split('[')[0]
-                            values = []
-                            for attr in ['HPDrainRate', 'CircleSize', 'OverallDifficulty', 'ApproachRate']:
-                                match = re.search(r'{0}:([0-9\.]+)'.format(attr), diff_section)
-                                if match:
-                                    values.append(float(match.group(1)))
-                            if len(values) >= 2:
-                                sr_estimate = sum(values) / len(values) * 0.5
-                                logger.info(f"Estimated star rating from .osu file: {sr_estimate:.2f}*")
-                                sr_from_db = sr_estimate
-                except Exception as e:
-                    logger.error(f"Error extracting star rating from .osu file: {e}")
-
-            beatmap_data = parse_osu_file(map_path)
             if not beatmap_data:
                 logger.error("Failed to parse beatmap.")
                 self.status_update.emit(f"Error parsing map: {replay_basename}")
                 self.error_occurred.emit(f"Failed to parse map: {map_basename}")
                 return
 
-            hit_offsets = correlate_inputs_and_calculate_offsets(input_actions, beatmap_data, od_from_db, mods)
-
-            results = {
-                "replay_name": replay_basename,
-                "map_name": map_basename, # Use map_basename here
-                "mods": str(mods),
-                "score": score,
-                "star_rating": sr_from_db,
-                "avg_offset": None,
-                "ur": None,
-                "matched_hits": 0,
-                "tendency": "N/A",
-                "hit_offsets": hit_offsets
-            }
-
-            if hit_offsets:
-                try:
-                    average_offset = statistics.mean(hit_offsets)
-                    stdev_offset = statistics.stdev(hit_offsets) if len(hit_offsets) > 1 else 0.0
-                    unstable_rate = stdev_offset * 10
-                    matched_hits_count = len(hit_offsets)
-
-                    results.update({
-                        "avg_offset": average_offset,
-                        "ur": unstable_rate,
-                        "matched_hits": matched_hits_count
-                    })
-
-                    logger.info("--- Analysis Results ---")
-                    logger.info(f" Replay: {replay_basename}")
-                    logger.info(f" Map: {map_basename}") # Log map_basename
-                    logger.info(f" Mods: {mods}")
-                    logger.info(f" Score: {score:,}")
-                    logger.info(f" Star Rating: {sr_from_db:.2f}*" if sr_from_db is not None else " Star Rating: N/A")
-
-                    if MANUAL_REPLAY_OFFSET_MS != 0:
-                        logger.info(f" Replay Time Offset: {MANUAL_REPLAY_OFFSET_MS} ms (Applied)")
-
-                    logger.info(f" Average Hit Offset: {average_offset:+.2f} ms")
-                    logger.info(f" Hit Offset StDev:   {stdev_offset:.2f} ms")
-                    logger.info(f" Unstable Rate (UR): {unstable_rate:.2f}")
-
-                    tendency = "ON TIME"
-                    if average_offset < -2.0:
-                        tendency = "EARLY"
-                    elif average_offset > 2.0:
-                        tendency = "LATE"
-
-                    results["tendency"] = tendency
-                    logger.info(f" Tendency: Hitting {tendency}")
-                    print(f"Result for {replay_basename}: Average Hit Offset: {average_offset:+.2f} ms ({tendency})")
-                    logger.info("------------------------")
-
-                except statistics.StatisticsError as e:
-                    logger.error(f"Statistics error: {e}")
-                    results["tendency"] = "Stat Error"
-                except Exception as e:
-                    logger.error(f"Error calculating stats: {e}")
-                    traceback.print_exc()
-                    results["tendency"] = "Calc Error"
-            else:
-                logger.warning("--- Analysis Results ---")
-                logger.warning(" Could not calculate average hit offset.")
-                logger.warning("------------------------")
-                results["tendency"] = "Error/No Data"
+            hit_offsets, offset_stats = self._stage_correlate(replay_data, beatmap_data, od_from_db)
+            results = self._stage_summarize(replay_data, replay_basename, map_basename, sr_from_db, hit_offsets, offset_stats)
 
             # Emit results for main app to handle (including saving)
             self.analysis_complete.emit(results)
             self.status_update.emit("Monitoring...") # Set status back to monitoring
 
         except Exception as e:
-            logger.error(f"Unhandled exception in AnalysisWorker: {e}")
-            traceback.print_exc()
+            logger.exception(f"Unhandled exception in AnalysisWorker: {e}")
             self.error_occurred.emit(f"Unhandled error during analysis: {e}")
         finally:
-            self._is_running = False
+            # Don't drop the last reference to a prefetch that is still running on the pool
+            if map_prefetch is not None: map_prefetch[1].wait()
+
+    def _start_map_prefetch(self):
+        """Reads the beatmap hash from the replay header and starts resolving the map in the background.
+           Returns (beatmap_hash, task), or None if the header can't be read (the map is resolved inline then).
+        """
+        try:
+            with open(self.replay_path, 'rb') as f: header = osr_header.parse_stream(f)
+        except Exception as e: logger.debug("Could not read replay header for prefetch: %s", e); return None
+        if header.mode != GameMode.STD.value or not header.beatmap_hash: return None
+        task = _BackgroundCall(_resolve_map, header.beatmap_hash)
+        _get_stage_pool().start(task)
+        return header.beatmap_hash, task
+
+    def _stage_parse_replay(self):
+        return parse_replay_file(self.replay_path)
+
+    def _stage_resolve_map(self, beatmap_hash, map_prefetch):
+        if map_prefetch is not None and map_prefetch[0] == beatmap_hash: return map_prefetch[1].result()
+        return _resolve_map(beatmap_hash)
+
+    def _stage_correlate(self, replay_data, beatmap_data, beatmap_od):
+        hit_offsets, offset_stats = correlate_inputs_and_calculate_offsets(
+            replay_data['input_times'], replay_data['input_keys'], beatmap_data, beatmap_od, replay_data['mods'], return_stats=True)
+        return hit_offsets, offset_stats
+
+    def _stage_summarize(self, replay_data, replay_basename, map_basename, sr_from_db, hit_offsets, offset_stats):
+        """Builds the results dict for the GUI and logs the summary."""
+        mods, score = replay_data['mods'], replay_data['score']
+        matched_hits_count, average_offset, offset_m2 = offset_stats
+        results = {
+            "replay_name": replay_basename,
+            "map_name": map_basename, # Use map_basename here
+            "mods": str(mods),
+            "score": score,
+            "star_rating": sr_from_db,
+            "avg_offset": None,
+            "ur": None,
+            "matched_hits": 0,
+            "tendency": "N/A",
+            "hit_offsets": hit_offsets.tolist() # Plain list for the GUI side
+        }
+
+        if matched_hits_count:
+            try:
+                # Mean and M2 were accumulated during correlation, no second pass over the offsets
+                stdev_offset = math.sqrt(offset_m2 / (matched_hits_count - 1)) if matched_hits_count > 1 else 0.0 # Sample stdev
+                unstable_rate = stdev_offset * 10
+
+                results.update({
+                    "avg_offset": average_offset,
+                    "ur": unstable_rate,
+                    "matched_hits": matched_hits_count
+                })
+
+                tendency = _TENDENCIES[(average_offset >= -2.0) + (average_offset > 2.0)] # < -2 early, > +2 late
+                results["tendency"] = tendency
+
+                # One record for the whole summary instead of a logger call per line
+                summary_lines = [
+                    "--- Analysis Results ---",
+                    f" Replay: {replay_basename}",
+                    f" Map: {map_basename}",
+                    f" Mods: {mods}",
+                    f" Score: {score:,}",
+                    f" Star Rating: {sr_from_db:.2f}*" if sr_from_db is not None else " Star Rating: N/A",
+                ]
+                if MANUAL_REPLAY_OFFSET_MS != 0:
+                    summary_lines.append(f" Replay Time Offset: {MANUAL_REPLAY_OFFSET_MS} ms (Applied)")
+                summary_lines += [
+                    f" Average Hit Offset: {average_offset:+.2f} ms",
+                    f" Hit Offset StDev:   {stdev_offset:.2f} ms",
+                    f" Unstable Rate (UR): {unstable_rate:.2f}",
+                    f" Tendency: Hitting {tendency}",
+                    "------------------------",
+                ]
+                logger.info("\n".join(summary_lines))
+                print(f"Result for {replay_basename}: Average Hit Offset: {average_offset:+.2f} ms ({tendency})")
+
+            except Exception as e:
+                logger.exception(f"Error calculating stats: {e}")
+                results["tendency"] = "Calc Error"
+        else:
+            logger.warning("--- Analysis Results ---\n Could not calculate average hit offset.\n------------------------")
+            results["tendency"] = "Error/No Data"
+
+        return results
 
     def stop(self):
         self._is_running = False
 
+# --- Replay Folder Scan ---
+def scan_replay_folder(folder):
+    """Returns {path: mtime_ns} for every .osr file directly inside folder.
+       Uses os.scandir so the file type comes from the directory listing itself.
+    """
+    replays = {}
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.name.lower().endswith('.osr') and entry.is_file(follow_symlinks=False):
+                    replays[entry.path] = entry.stat(follow_symlinks=False).st_mtime_ns
+    except OSError as e: logger.error(f"Error scanning replay folder {folder}: {e}")
+    return replays
+
 # --- Watchdog Event Handler (Keep as QObject for signals) ---
 class ReplayHandler(FileSystemEventHandler, QObject):
+    """Emits new_replay_signal once osu! has finished writing a replay.
+       With close_events (the inotify observer reports IN_CLOSE_WRITE as on_closed) that is used directly.
+       Other observers send no close events; a replay counts as finished once its size has
+       stayed the same for debounce_period after the last created/modified event.
+    """
     new_replay_signal = pyqtSignal(str)
-    def __init__(self): FileSystemEventHandler.__init__(self); QObject.__init__(self); self.last_event_time = 0; self.debounce_period = 2.0; self.last_processed_path = None
+    max_empty_checks = 40 # Settle checks a still-empty file gets (~10s) before it is given up on
+    def __init__(self, close_events=False):
+        FileSystemEventHandler.__init__(self); QObject.__init__(self)
+        self.debounce_period = 0.25; self.last_processed_path = None; self.known_replays = {}
+        self._close_events = close_events
+        self._pending = {} # path -> (threading.Timer, size when scheduled, consecutive empty checks)
+        self._lock = threading.Lock() # Observer thread and settle timers both touch the dicts
+
+    @staticmethod
+    def _is_replay(event): return not event.is_directory and event.src_path.lower().endswith(".osr")
+
     def on_created(self, event):
-        current_time = time.time()
-        if not event.is_directory and event.src_path.lower().endswith(".osr"):
-            file_path = event.src_path; logger.debug(f"Event detected: {file_path}")
-            if current_time - self.last_event_time < self.debounce_period: logger.debug(f"Debouncing event (time): {os.path.basename(file_path)}"); return
-            self.last_event_time = current_time
-            time.sleep(0.5)
-            if os.path.exists(file_path):
-                try: s1=os.path.getsize(file_path); time.sleep(0.2); s2=os.path.getsize(file_path);
-                except OSError as e: logger.error(f"Error checking size {file_path}: {e}"); return # Added return on error
-                logger.info(f"Watchdog detected new replay: {os.path.basename(file_path)}")
-                self.last_processed_path = file_path
-                self.new_replay_signal.emit(file_path)
-            else: logger.warning(f"File disappeared: {file_path}")
+        if self._is_replay(event): logger.debug("Event detected: %s", event.src_path); self._schedule_settle_check(event.src_path)
+
+    def on_modified(self, event):
+        if self._is_replay(event): self._schedule_settle_check(event.src_path)
+
+    def on_closed(self, event):
+        if self._is_replay(event): self._cancel_settle_check(event.src_path); self._emit_if_new(event.src_path)
+
+    def _schedule_settle_check(self, file_path, empty_checks=0):
+        if self._close_events: return # on_closed reports the finished file
+        try: size = os.path.getsize(file_path)
+        except OSError: return # Gone again; a later event will reschedule if it comes back
+        with self._lock:
+            previous = self._pending.pop(file_path, None)
+            if previous: previous[0].cancel()
+            timer = threading.Timer(self.debounce_period, self._settle_check, (file_path,)); timer.daemon = True
+            self._pending[file_path] = (timer, size, empty_checks)
+            timer.start()
+
+    def _settle_check(self, file_path):
+        with self._lock: _, scheduled_size, empty_checks = self._pending.pop(file_path, (None, None, 0))
+        try: size = os.path.getsize(file_path)
+        except OSError as e: logger.warning(f"File disappeared: {file_path} ({e})"); return
+        if size != scheduled_size: self._schedule_settle_check(file_path); return # Still being written
+        if size == 0:
+            if empty_checks >= self.max_empty_checks: logger.warning(f"Replay file stayed empty, ignoring: {file_path}"); return
+            self._schedule_settle_check(file_path, empty_checks + 1); return # Created but not written yet
+        self._emit_if_new(file_path)
+
+    def _cancel_settle_check(self, file_path):
+        with self._lock: pending = self._pending.pop(file_path, None)
+        if pending: pending[0].cancel()
+
+    def cancel_pending(self):
+        with self._lock: pending, self._pending = list(self._pending.values()), {}
+        for timer, *_ in pending: timer.cancel()
+
+    def _emit_if_new(self, file_path):
+        try: mtime_ns = os.stat(file_path).st_mtime_ns
+        except OSError as e: logger.warning(f"File disappeared: {file_path} ({e})"); return
+        with self._lock:
+            if self.known_replays.get(file_path) == mtime_ns: logger.debug("Ignoring event for unchanged replay: %s", os.path.basename(file_path)); return
+            self.known_replays[file_path] = mtime_ns
+        logger.info(f"Watchdog detected new replay: {os.path.basename(file_path)}")
+        self.last_processed_path = file_path
+        self.new_replay_signal.emit(file_path)
 
 # --- Watchdog Monitor Thread (Keep as QThread) ---
 class MonitorThread(QThread):
@@ -656,26 +1064,36 @@ class MonitorThread(QThread):
         super().__init__()
         self.path_to_watch = path_to_watch
         self.observer = Observer()
-        self.event_handler = ReplayHandler()
+        # Only the inotify backend reports closed files; every other observer needs the settle timer
+        self.event_handler = ReplayHandler(close_events=type(self.observer).__name__ == 'InotifyObserver')
         self.event_handler.new_replay_signal.connect(self.new_replay_found)
         self._is_running = True
+        self._stop_event = threading.Event() # Wakes run() as soon as stop() is called
 
     def run(self):
         logger.info(f"Starting monitor thread: {self.path_to_watch}")
+        # Remember the replays already on disk so repeated events for them are not re-analyzed
+        self.event_handler.known_replays = scan_replay_folder(self.path_to_watch)
+        logger.info(f"Found {len(self.event_handler.known_replays)} existing replays in monitored folder.")
         self.observer.schedule(self.event_handler, self.path_to_watch, recursive=False)
         self.observer.start()
+        # watchdog's Observer resolves to the kernel-notified backend for the platform; say so if it had to poll
+        observer_name = type(self.observer).__name__
+        if 'Polling' in observer_name: logger.warning(f"No native file system events available; watching replays with {observer_name}.")
+        else: logger.info(f"Watching replays with {observer_name}.")
         try:
-            while self._is_running:
-                time.sleep(1)
-        except Exception as e: logger.error(f"Monitor thread error: {e}"); traceback.print_exc()
+            self._stop_event.wait() # watchdog delivers events on its own thread; nothing to poll here
+        except Exception as e: logger.exception(f"Monitor thread error: {e}")
         finally:
             self.observer.stop()
             self.observer.join()
+            self.event_handler.cancel_pending()
             logger.info("Monitor thread stopped.")
 
     def stop(self):
         logger.info("Requesting monitor thread stop...")
         self._is_running = False
+        self._stop_event.set()
         self.observer.stop()
 
 # --- Removed MainWindow Class --- #
@@ -1,8 +1,8 @@
 import sys
 import os
 import csv
-import configparser
 import logging
+import functools
 import time # Added for sleep
 script_dir = os.path.dirname(os.path.abspath(__file__))
 icon_base_dir = os.path.join(script_dir, 'icons')
@@ -11,12 +11,13 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
     QLabel, QStackedWidget, QGridLayout, QFrame, QScrollArea, QMenu, QCheckBox,
     QToolButton, QTableWidget, QTableWidgetItem, QHeaderView, QLineEdit, 
-    QComboBox, QSlider, QFileDialog, QMessageBox, QDockWidget, QTreeWidget, 
-    QTreeWidgetItem, QSystemTrayIcon # <-- Re-added QSystemTrayIcon
+    QComboBox, QSlider, QFileDialog, QMessageBox, QDockWidget, QTreeView, 
+    QSystemTrayIcon # <-- Re-added QSystemTrayIcon
 )
 from PyQt6.QtCore import (
     Qt, QSize, QUrl, QMargins, QDateTime, QThread, pyqtSignal, QTimer, 
-    pyqtSlot, QCoreApplication, QLibraryInfo, QResource
+    pyqtSlot, QCoreApplication, QLibraryInfo, QResource, QAbstractItemModel,
+    QModelIndex
 )
 from PyQt6.QtGui import (
     QIcon, QPainter, QDesktopServices, QFont, QColor, QAction, QPen, 
@@ -24,7 +25,7 @@ from PyQt6.QtGui import (
 )
 import random
 from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis, QScatterSeries
-from collections import defaultdict
+from collections import defaultdict, deque
 
 # --- Setup Logging (Moved Up) --- 
 logger = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ except ImportError:
 try:
     from backend import (
         AnalysisWorker, MonitorThread, load_config, save_settings, load_osu_database,
-        get_user_data_dir, CONFIG_FILE, STATS_CSV_FILE, logger as backend_logger
+        get_user_data_dir, close_sr_cache, CONFIG_FILE, STATS_CSV_FILE, logger as backend_logger
     )
 except ImportError as e:
     print(f"FATAL ERROR: Could not import backend components: {e}")
@@ -53,6 +54,22 @@ except ImportError as e:
 script_dir = os.path.dirname(os.path.abspath(__file__))
 icon_base_dir = os.path.join(script_dir, 'icons')
 
+CSV_READ_BUFFER_SIZE = 1 << 20 # 1 MiB; history files are read start to finish in one go
+
+@functools.lru_cache(maxsize=1)
+def _github_icon():
+    """Loads the sidebar GitHub icon once, pre-rendered at the button's 24x24 size. Returns None if unavailable."""
+    icon_path = os.path.join(icon_base_dir, "github.svg")
+    if not os.path.exists(icon_path):
+        logger.warning(f"GitHub icon file not found at: {icon_path}")
+        return None
+    logger.debug(f"Attempting to load GitHub icon from: {icon_path}")
+    pixmap = QIcon(icon_path).pixmap(QSize(24, 24))
+    if pixmap.isNull():
+        logger.warning(f"GitHub icon file exists but failed to load or is invalid: {icon_path}")
+        return None
+    return QIcon(pixmap)
+
 # === Osu! Process Monitor Thread ===
 class OsuProcessMonitorThread(QThread):
     osu_running_status = pyqtSignal(bool) # Signal emits True if osu! is running, False otherwise
@@ -82,7 +99,7 @@ class OsuProcessMonitorThread(QThread):
                     self.osu_running_status.emit(current_osu_status)
                     self.osu_was_running = current_osu_status
                 else:
-                    logger.debug(f"osu! process status unchanged ({'Running' if current_osu_status else 'Not Running'})")
+                    logger.debug("osu! process status unchanged (%s)", 'Running' if current_osu_status else 'Not Running')
                     
                 # Wait for the next check interval
                 # Use a loop with shorter sleeps to make stop() more responsive
@@ -117,8 +134,234 @@ class OsuProcessMonitorThread(QThread):
         logger.info("Requesting osu! process monitor thread stop...")
         self._is_running = False
 
+# === History Tree Model ===
+class HistoryTreeModel(QAbstractItemModel):
+    """Two-level model for the history page: best matching play per map on top, other matching plays as children.
+
+    Filtering, sorting and grouping follow the history page's long-standing rules: a play is shown if the
+    search text occurs in any of its raw column values, plays are sorted by the chosen column, maps appear
+    in the order of their first play and each map's top row is its best-scoring matching play.
+    Per-entry sort values and search text are computed once; display texts only when a row is first shown.
+    """
+    ENTRY_ROLE = Qt.ItemDataRole.UserRole + 1
+    NUMERIC_HEADERS = ('AvgOffsetMs', 'UR', 'StarRating', 'MatchedHits')
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._entries = []
+        self._info = {} # id(entry) -> [entry, sort values, search text, display texts (None until needed)]
+        self._filter_text = "" # Lowercased search text
+        self._sort = (0, Qt.SortOrder.DescendingOrder) # Date (Newest First)
+        self._groups = [] # Each group: [row_index, best_entry, child_entries]
+        self._group_by_map = {} # MapName -> group, for incremental appends
+        self._alignments = []
+        for header in self._headers:
+            if header in ['AvgOffsetMs', 'UR', 'Score', 'StarRating', 'MatchedHits', 'Timestamp']:
+                self._alignments.append(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            elif header == 'MapName':
+                self._alignments.append(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+            else: # Mods
+                self._alignments.append(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        star_icon_path = os.path.join(icon_base_dir, 'star.svg')
+        self._star_icon = QIcon(star_icon_path) if os.path.exists(star_icon_path) else None
+        self._star_column = self._headers.index('StarRating') if 'StarRating' in self._headers else -1
+        self._score_column = self._headers.index('Score')
+        self._bold_font = QFont() # Best entry per map is bold; built once, data() is called per cell per paint
+        self._bold_font.setBold(True)
+
+    @staticmethod
+    def score_value(score_str):
+        """Converts a score string to a sortable numeric value."""
+        try:
+            return int(str(score_str).replace(',', ''))
+        except (ValueError, TypeError):
+            return -1 # Treat N/A or invalid scores as lowest
+
+    def _sort_value(self, header, value):
+        if header == 'Timestamp':
+            try: return datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
+            except ValueError: return datetime.min
+        if header == 'Score':
+            return self.score_value(value)
+        if header in self.NUMERIC_HEADERS:
+            try: return float(str(value).replace('+','').replace('ms','').replace('*','').replace(',','').strip())
+            except ValueError: return -float('inf')
+        return str(value).lower() # MapName, Mods
+
+    def _entry_info(self, entry):
+        """Sort values and search text of an entry, computed on first use. The cache holds the entry itself,
+           so its id cannot be reused by another dict while cached."""
+        info = self._info.get(id(entry))
+        if info is None:
+            sort_values = tuple(self._sort_value(header, entry.get(header, "N/A")) for header in self._headers)
+            search_text = '\0'.join(str(entry.get(header, "")) for header in self._headers).lower()
+            info = self._info[id(entry)] = [entry, sort_values, search_text, None]
+        return info
+
+    def _display_texts(self, entry, sort_values):
+        texts = []
+        for header, sort_value in zip(self._headers, sort_values):
+            if header == 'Score':
+                text = f"{sort_value:,}" if sort_value != -1 else "N/A"
+            elif header == 'StarRating':
+                text = f"{sort_value:.2f}" if sort_value != -float('inf') else "N/A"
+            else:
+                text = str(entry.get(header, "N/A"))
+            texts.append(text)
+        return tuple(texts)
+
+    def _row(self, entry):
+        """Entry info with its display texts, formatted the first time the view asks for the row."""
+        info = self._entry_info(entry)
+        if info[3] is None:
+            info[3] = self._display_texts(entry, info[1])
+        return info
+
+    def _group_members(self):
+        """Filters, sorts and groups the entries. Returns the map names in display order and,
+           per map, [best matching entry, other matching entries in sort order]."""
+        infos = [self._entry_info(entry) for entry in self._entries]
+        if self._filter_text:
+            infos = [info for info in infos if self._filter_text in info[2]]
+        column, order = self._sort
+        infos.sort(key=lambda info: info[1][column], reverse=order == Qt.SortOrder.DescendingOrder)
+
+        grouped_data = defaultdict(list)
+        for info in infos:
+            grouped_data[info[0].get('MapName', 'Unknown Map')].append(info)
+        members = {}
+        for map_name, map_infos in grouped_data.items():
+            best = max(map_infos, key=lambda info: info[1][self._score_column]) # First of equal scores wins
+            members[map_name] = [best[0], [info[0] for info in map_infos if info is not best]]
+        return list(grouped_data), members
+
+    def _regroup(self):
+        map_names, members = self._group_members()
+        self.beginResetModel()
+        self._groups = [[row] + members[map_name] for row, map_name in enumerate(map_names)]
+        self._group_by_map = dict(zip(map_names, self._groups))
+        self.endResetModel()
+        logger.debug("Grouped %d entries into %d map groups.", len(self._entries), len(self._groups))
+
+    def set_entries(self, entries):
+        """Rebuilds the model from a flat list of history entries."""
+        self._entries = list(entries)
+        old_info = self._info
+        self._info = {id(entry): old_info[id(entry)] for entry in self._entries if id(entry) in old_info}
+        self._regroup()
+
+    def set_filter_text(self, filter_text):
+        """Shows only plays whose raw values contain filter_text (case-insensitive)."""
+        filter_text = filter_text.strip().lower()
+        if filter_text != self._filter_text:
+            self._filter_text = filter_text
+            self._regroup()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if (column, order) != self._sort:
+            self._sort = (column, order)
+            self._regroup()
+
+    def add_entry(self, entry):
+        """Adds one new history entry without resetting the model, so expanded maps stay expanded.
+           The entry's map is inserted or moved to where a full regroup would put it; the new play
+           either becomes the map's top row (the previous best moves down) or joins its children.
+        """
+        self._entries.append(entry)
+        if self._filter_text and self._filter_text not in self._entry_info(entry)[2]:
+            return # Hidden by the current search
+        map_name = entry.get('MapName', 'Unknown Map')
+        map_names, members = self._group_members()
+        new_row = map_names.index(map_name)
+        best_entry, children = members[map_name]
+        root = QModelIndex()
+        group = self._group_by_map.get(map_name)
+        if group is None:
+            self.beginInsertRows(root, new_row, new_row)
+            group = [new_row, best_entry, children]
+            self._groups.insert(new_row, group); self._group_by_map[map_name] = group
+            for row, other in enumerate(self._groups): other[0] = row
+            self.endInsertRows()
+            return
+
+        old_row = group[0]
+        if new_row != old_row:
+            self.beginMoveRows(root, old_row, old_row, root, new_row + 1 if new_row > old_row else new_row)
+            self._groups.insert(new_row, self._groups.pop(old_row))
+            for row, other in enumerate(self._groups): other[0] = row
+            self.endMoveRows()
+
+        parent_index = self.createIndex(new_row, 0)
+        old_children = {id(child) for child in group[2]}
+        position = next(i for i, child in enumerate(children) if id(child) not in old_children)
+        self.beginInsertRows(parent_index, position, position)
+        group[2] = children
+        self.endInsertRows()
+        if best_entry is not group[1]:
+            group[1] = best_entry
+            self.dataChanged.emit(parent_index, self.createIndex(new_row, len(self._headers) - 1))
+
+    # --- QAbstractItemModel interface ---
+    def index(self, row, column, parent=QModelIndex()):
+        if column < 0 or column >= len(self._headers):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column) if 0 <= row < len(self._groups) else QModelIndex()
+        if parent.internalPointer() is None: # Children hang off top-level rows only
+            group = self._groups[parent.row()]
+            if 0 <= row < len(group[2]):
+                return self.createIndex(row, column, group)
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        group = index.internalPointer()
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(group[0], 0)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups)
+        if parent.internalPointer() is None and parent.column() == 0:
+            return len(self._groups[parent.row()][2])
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        is_top = group is None
+        entry = self._groups[index.row()][1] if is_top else group[2][index.row()]
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._row(entry)[3][column]
+        if role == Qt.ItemDataRole.UserRole:
+            return self._entry_info(entry)[1][column]
+        if role == self.ENTRY_ROLE:
+            return entry
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._alignments[column]
+        if role == Qt.ItemDataRole.DecorationRole and column == self._star_column:
+            return self._star_icon
+        if role == Qt.ItemDataRole.FontRole and is_top:
+            return self._bold_font
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole and 0 <= section < len(self._headers):
+            return self._headers[section]
+        return None
+
 class MainWindow(QMainWindow):
     config_updated = pyqtSignal(dict)
+    analyze_path = pyqtSignal(str) # Queued to the persistent AnalysisWorker
 
     def __init__(self):
         super().__init__()
@@ -141,13 +384,33 @@ class MainWindow(QMainWindow):
         
         # --- Load History Data (needed for bottom bar label) --- 
         self.history_data = self.load_history_from_csv()
+        # New history rows are written to the CSV in batches (see queue_history_entry_for_csv)
+        self._pending_history_rows = []
+        self._history_flush_timer = QTimer(self)
+        self._history_flush_timer.setSingleShot(True)
+        self._history_flush_timer.setInterval(2000) # Flush at most 2s after the first pending row
+        self._history_flush_timer.timeout.connect(self.flush_pending_history_rows)
+        QApplication.instance().aboutToQuit.connect(self.flush_pending_history_rows) # Covers quits that skip closeEvent
+        # The history search box applies its filter once typing pauses
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.timeout.connect(self._apply_history_filter)
+        # Full history rebuilds requested in quick succession collapse into one
+        self._history_rebuild_timer = QTimer(self)
+        self._history_rebuild_timer.setSingleShot(True)
+        self._history_rebuild_timer.setInterval(250)
+        self._history_rebuild_timer.timeout.connect(self.populate_history_tree)
         
         # --- Backend related initializations ---
         self.config_data = {}
         self.osu_db = None
         self.analysis_worker = None
         self.analysis_thread = None
+        self._analysis_busy = False # True from analyze_path.emit until the worker's analysis_finished
+        self.replay_queue = deque(maxlen=64) # Replays waiting for the running analysis; oldest dropped when full
+        self._queued_replays = set() # Same paths as replay_queue, for O(1) duplicate checks
         self.monitor_thread = None
+        self._stopping_monitor_threads = set() # Stopped monitors still winding down; keeps them alive until finished
         self.osu_process_monitor_thread = None # Initialize osu monitor
         # Store last analysis results for graph metrics
         self.last_analysis_avg_offset = None
@@ -219,16 +482,10 @@ class MainWindow(QMainWindow):
         sidebar_layout.addStretch()
         
         github_btn = QPushButton() # ... (github button setup as before) ...
-        icon_file = "github.svg"
-        icon_path = os.path.join(icon_base_dir, icon_file)
-        if os.path.exists(icon_path):
-            github_btn.setIcon(QIcon(icon_path))
-            logger.debug(f"Attempting to load GitHub icon from: {icon_path}")
-            if github_btn.icon().isNull():
-                logger.warning(f"GitHub icon file exists but failed to load or is invalid: {icon_path}")
-                github_btn.setText("GH")
+        github_icon = _github_icon()
+        if github_icon is not None:
+            github_btn.setIcon(github_icon)
         else:
-            logger.warning(f"GitHub icon file not found at: {icon_path}")
             github_btn.setText("GH")
         github_btn.setIconSize(QSize(24, 24))
         github_btn.setFixedSize(48, 48) # Fixed syntax
@@ -339,12 +596,20 @@ class MainWindow(QMainWindow):
         return button
     
     def switch_page(self, index):
+        if index == 1: # History: pick up external edits to the CSV, if any
+            self.reload_history_if_changed()
         self.stack.setCurrentIndex(index)
         buttons = [self.analyzer_btn, self.history_btn, self.settings_btn, self.info_btn]
+        previous_index = getattr(self, '_current_nav_index', None)
+        # Restyle only the buttons whose "checked" state flips (old and new page); a QSS re-polish is not cheap.
+        # Tracked by index: the buttons aren't checkable, so the "checked" property can't be read back reliably.
         for i, btn in enumerate(buttons):
+            if previous_index is not None and i not in (previous_index, index):
+                continue
             btn.setProperty("checked", i == index)
             btn.style().unpolish(btn)
             btn.style().polish(btn)
+        self._current_nav_index = index
             
         # --- REMOVED Margin Adjustment Code ---
         # Adjust content area margins based on the page
@@ -524,30 +789,6 @@ class MainWindow(QMainWindow):
         
         return page
         
-    def create_stat_card(self, title, value, color):
-        card = QFrame()
-        card.setObjectName("statCard")
-        card.setProperty("cardColor", color)
-        card.setStyleSheet(f"#statCard[cardColor='{color}'] {{ border-top: 3px solid {color}; }}")
-        
-        layout = QVBoxLayout(card)
-        layout.setContentsMargins(16, 16, 16, 16)  # Reduced padding
-        layout.setSpacing(4)  # Reduced spacing
-        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        title_label = QLabel(title)
-        title_label.setObjectName("statTitle")
-        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        
-        value_label = QLabel(value)
-        value_label.setObjectName("statValue")
-        value_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        value_label.setAutoFillBackground(False)
-        
-        layout.addWidget(title_label)
-        layout.addWidget(value_label)
-        return card
-    
     def toggle_graph_metric(self, metric, enabled):
         # Get color for this metric from the action's stored data
         color_qcolor = None
@@ -780,7 +1021,6 @@ class MainWindow(QMainWindow):
         self.history_filter_input = QLineEdit()
         self.history_filter_input.setPlaceholderText("Search table content...") # Changed placeholder
         self.history_filter_input.setObjectName("searchInput")
-        self.history_filter_input.textChanged.connect(self.filter_history)
         controls_layout.addWidget(self.history_filter_input)
 
         # Sort ComboBox
@@ -809,7 +1049,7 @@ class MainWindow(QMainWindow):
         for text in sort_options:
             self.history_sort_combo.addItem(text, sort_options[text]) # Store tuple as item data
         
-        self.history_sort_combo.currentIndexChanged.connect(self.filter_history) # Trigger sort/filter on change
+        self.history_sort_combo.currentIndexChanged.connect(self.filter_history) # Trigger re-sort on change
         controls_layout.addWidget(self.history_sort_combo)
 
         # Removed Export/Import/Clear buttons
@@ -818,14 +1058,19 @@ class MainWindow(QMainWindow):
         controls_layout.addStretch()
         layout.addWidget(controls_container)
 
-        # --- History Tree (Changed from Table) --- 
-        self.history_tree = QTreeWidget()
+        # --- History Tree (model/view; the model filters, sorts and groups the plays) --- 
+        self.history_model = HistoryTreeModel(self.history_headers, self)
+        self.history_filter_input.textChanged.connect(lambda _: self._filter_timer.start(150)) # Debounce typing
+
+        self.history_tree = QTreeView()
         self.history_tree.setObjectName("historyTree")
+        self.history_tree.setModel(self.history_model)
         self.history_tree.setAlternatingRowColors(True)
         self.history_tree.setRootIsDecorated(True)
         self.history_tree.setSortingEnabled(False)  # Disable sorting by clicking headers
-        self.history_tree.setAnimated(True)
-        self.history_tree.setHeaderLabels(self.history_headers)
+        self.history_tree.setUniformRowHeights(True) # Every row is one line of text; skip per-row size hints
+        self.history_tree.setAnimated(False)
+        self.history_tree.setAutoScroll(False)
 
         # Set column resize modes
         header = self.history_tree.header()
@@ -853,215 +1098,40 @@ class MainWindow(QMainWindow):
         return page
 
     def populate_history_tree(self, filter_text=None): # Renamed method
-        """Populates the history tree using self.history_data, applying filter, sort, and grouping."""
-        # --- REMOVED redundant update of entry count label --- 
-
-        if filter_text is None:
-             filter_text = self.history_filter_input.text() if hasattr(self, 'history_filter_input') else ""
-
-        if not hasattr(self, 'history_tree') or not hasattr(self, 'history_data') or not hasattr(self, 'history_sort_combo'):
-             logger.error("Cannot populate history tree: tree, data, or sort combo missing.")
+        """Rebuilds the history model from self.history_data with the current search text and sort."""
+        if not hasattr(self, 'history_model') or not hasattr(self, 'history_data') or not hasattr(self, 'history_sort_combo'):
+             logger.error("Cannot populate history tree: model, data, or sort combo missing.")
              return
 
-        self.history_tree.setSortingEnabled(False) # Disable sorting during population
-        self.history_tree.clear() # Clear existing items before populating
-        self.history_tree.setRootIsDecorated(True) # Show expand arrows
+        # Reset, re-filter and re-sort land as one repaint instead of one per step
+        self.history_tree.setUpdatesEnabled(False)
+        try:
+            self._apply_history_filter(filter_text)
+            self.history_model.set_entries(self.history_data)
+            self.filter_history()
+        finally:
+            self.history_tree.setUpdatesEnabled(True)
+
+    def request_history_rebuild(self):
+        """Schedules a full history rebuild; repeated requests within 250 ms share one rebuild."""
+        if not self._history_rebuild_timer.isActive():
+            self._history_rebuild_timer.start()
+
+    def _apply_history_filter(self, filter_text=None):
+        """Applies the (debounced) search text to the history model."""
+        if filter_text is None:
+             filter_text = self.history_filter_input.text()
+        self.history_model.set_filter_text(filter_text)
 
-        # --- Get Sort Criteria from ComboBox --- 
+    def filter_history(self):
+        """Slot called when the history sort combo changes; re-sorts the history model by the selected column."""
         sort_data = self.history_sort_combo.currentData()
         if sort_data and isinstance(sort_data, tuple) and len(sort_data) == 2:
              sort_col, sort_order = sort_data
         else:
              sort_col, sort_order = (0, Qt.SortOrder.DescendingOrder) # Default: Date Descending
              logger.warning("Could not read sort criteria from combo box, using default.")
-
-        # --- Filter and Sort Data (Initial flat list) --- 
-        filtered_sorted_data = self.filter_and_sort_data(filter_text, sort_col, sort_order)
-
-        # --- Group Data by Map Name --- 
-        grouped_data = defaultdict(list)
-        for entry in filtered_sorted_data:
-            # Use a tuple (MapName, Mods) as key for more precise grouping?
-            # For now, just MapName
-            map_name = entry.get('MapName', 'Unknown Map')
-            grouped_data[map_name].append(entry)
-
-        logger.debug(f"Grouped {len(filtered_sorted_data)} entries into {len(grouped_data)} map groups.")
-
-        # --- Populate Tree with Grouping --- 
-        items_to_add = []
-        for map_name, entries in grouped_data.items():
-            if not entries: continue
-
-            # Find best score entry for this map
-            best_entry = max(entries, key=lambda x: self._get_score_value(x.get('Score')))
-
-            # Create top-level item for the best entry using the helper
-            top_item = self._create_history_tree_item(best_entry)
-            
-            # --- Removed explicit check for None and debug logs ---
-            # Re-add explicit check for None from helper
-            if top_item is None:
-                logger.error(f"Skipping map group '{map_name}' because its best entry failed to create a tree item.")
-                continue # Skip this group
-
-            # Make best entry bold
-            font = top_item.font(0) # Get font for first column
-            font.setBold(True)
-            for col_index in range(self.history_tree.columnCount()):
-                top_item.setFont(col_index, font)
-            
-            # Store the original entry dict with the item for later use/sorting if needed
-            top_item.setData(0, Qt.ItemDataRole.UserRole + 1, best_entry)
-
-            items_to_add.append(top_item)
-
-            # Create child items for other entries (if any)
-            if len(entries) > 1:
-                other_entries = [e for e in entries if e != best_entry]
-                # Sort children by the criteria selected in the combo box
-                # (They are already sorted within the `entries` list from `filter_and_sort_data`)
-                for entry in other_entries:
-                    child_item = self._create_history_tree_item(entry)
-                    child_item.setData(0, Qt.ItemDataRole.UserRole + 1, entry) # Store original entry
-                    top_item.addChild(child_item)
-            else:
-                 # Hide expand arrow if only one entry for this map
-                 top_item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
-        
-        # Add all top-level items at once (potentially faster than one by one)
-        self.history_tree.addTopLevelItems(items_to_add)
-
-    def _get_score_value(self, score_str):
-        """Helper to convert score string to a sortable numeric value."""
-        try:
-            # Remove commas before converting to int
-            return int(str(score_str).replace(',',''))
-        except (ValueError, TypeError):
-            return -1 # Treat N/A or invalid scores as lowest
-
-    def _create_history_tree_item(self, entry):
-        """Helper function to create and populate a QTreeWidgetItem from an entry dict."""
-        try:
-            item = QTreeWidgetItem()
-            for col_index, header in enumerate(self.history_headers):
-                value = entry.get(header, "N/A")
-                icon_path = None
-                item_text = str(value)
-
-                # --- Formatting --- 
-                if header == 'StarRating':
-                    icon_path = os.path.join(icon_base_dir, 'star.svg')
-                    try:
-                        num_val = float(str(value).replace('*','').strip())
-                        item_text = f"{num_val:.2f}"
-                    except (ValueError, TypeError):
-                        item_text = "N/A"
-                elif header == 'Score':
-                    try:
-                        # Format with comma, using the helper ensures numeric value first
-                        score_val = self._get_score_value(value)
-                        item_text = f"{score_val:,}" if score_val != -1 else "N/A"
-                    except (ValueError, TypeError):
-                        item_text = "N/A"
-                # Keep default item_text for other columns
-
-                item.setText(col_index, item_text)
-
-                # --- Icon --- 
-                # Re-enabled icon setting
-                if icon_path and os.path.exists(icon_path):
-                    icon = QIcon(icon_path)
-                    if not icon.isNull():
-                        item.setIcon(col_index, icon)
-
-                # --- Alignment --- 
-                if header in ['AvgOffsetMs', 'UR', 'Score', 'StarRating', 'MatchedHits', 'Timestamp']:
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                elif header == 'MapName':
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                else: # Mods
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-                    
-                # --- Set Size Hint for StarRating Column --- 
-                # Removed sizeHint setting
-                # if header == 'StarRating':
-                #      item.setSizeHint(col_index, QSize(40, 0))
-
-                # --- Sorting Data (store sortable values) --- 
-                sort_value = None
-                if header == 'Timestamp':
-                    try: sort_value = datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
-                    except ValueError: sort_value = datetime.min
-                elif header == 'Score':
-                    sort_value = self._get_score_value(value)
-                elif header in ['AvgOffsetMs', 'UR', 'StarRating', 'MatchedHits']:
-                    try:
-                        num_str = str(value).replace('+','').replace('ms','').replace('*','').replace(',','').strip()
-                        sort_value = -float('inf') if num_str.upper() == "N/A" else float(num_str)
-                    except ValueError:
-                        sort_value = -float('inf')
-                else: # MapName, Mods
-                    sort_value = str(value).lower()
-                
-                item.setData(col_index, Qt.ItemDataRole.UserRole, sort_value)
-                
-            return item # Return the successfully created item
-        except Exception as e:
-            logger.error(f"Error creating tree item for entry: {entry}", exc_info=True)
-            return None # Explicitly return None on error
-
-    def filter_and_sort_data(self, filter_text, sort_col_index, sort_order):
-        """Filters and sorts the self.history_data based on UI controls."""
-        lower_filter = filter_text.lower().strip()
-
-        # Filter
-        if lower_filter:
-            # Original filter logic
-            filtered_data = [
-                entry for entry in self.history_data
-                if any(lower_filter in str(entry.get(header, "")).lower() for header in self.history_headers)
-            ]
-        else:
-            filtered_data = list(self.history_data) # Work with a copy
-
-        # Sort (Restored logic)
-        if sort_col_index >= 0 and sort_col_index < len(self.history_headers):
-            sort_key_name = self.history_headers[sort_col_index]
-
-            # Correct sort key function handling different types
-            def sort_key_func(entry):
-                value = entry.get(sort_key_name, "N/A")
-                if sort_key_name == 'Timestamp':
-                    try: return datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
-                    except (ValueError, TypeError): return datetime.min
-                elif sort_key_name == 'Score': # Use helper for score
-                     return self._get_score_value(value)
-                elif sort_key_name in ['AvgOffsetMs', 'UR', 'StarRating', 'MatchedHits']:
-                    try:
-                        num_str = str(value).replace('+','').replace('ms','').replace('*','').replace(',','').strip()
-                        if num_str.upper() == "N/A": return -float('inf')
-                        return float(num_str)
-                    except (ValueError, TypeError): return -float('inf')
-                return str(value).lower() # Default string sort
-
-            reverse = (sort_order == Qt.SortOrder.DescendingOrder)
-            try:
-                # Sort the list in-place
-                filtered_data.sort(key=sort_key_func, reverse=reverse)
-            except Exception as e:
-                 logger.error(f"Error during sorting history data (key={sort_key_name}): {e}", exc_info=True)
-        else:
-             logger.warning(f"Invalid sort column index received: {sort_col_index}")
-
-        # Return the filtered (and potentially sorted) list
-        return filtered_data
-
-    def filter_history(self):
-        """Slot called when the history filter input text changes."""
-        # Trigger repopulate, which reads filter input and current sort state from combo box
-        logger.debug("Filter input changed, repopulating history tree.")
-        self.populate_history_tree()
+        self.history_model.sort(sort_col, sort_order)
 
     def export_history(self):
         """Exports the current history data (from memory) to a new CSV file."""
@@ -1101,17 +1171,12 @@ class MainWindow(QMainWindow):
                 imported_count = 0
                 new_entries = []
                 try:
-                    with open(open_path, 'r', newline='', encoding='utf-8') as csvfile:
-                         reader = csv.DictReader(csvfile)
-                         if not reader.fieldnames or not all(h in reader.fieldnames for h in self.history_headers):
+                    with open(open_path, 'r', newline='', encoding='utf-8', buffering=CSV_READ_BUFFER_SIZE) as csvfile:
+                         rows, _ = self._read_history_csv(csvfile)
+                         if rows is None:
                               raise ValueError(f"Import file is missing required headers or has incorrect format. Expected headers similar to: {self.history_headers}")
-
-                         for row in reader:
-                             # Basic validation - ensure required fields exist?
-                             # Create entry using defined headers, taking values from row or default
-                             entry = {h: row.get(h, 'N/A') for h in self.history_headers}
-                             new_entries.append(entry)
-                             imported_count += 1
+                         new_entries.extend(rows)
+                         imported_count += len(rows)
 
                     if new_entries:
                          # Append to existing data in memory
@@ -1124,7 +1189,7 @@ class MainWindow(QMainWindow):
                          # Append all new entries to the main CSV file
                          self.append_entries_to_csv(new_entries)
                          # Refresh tree UI - Removed sort_col argument
-                         self.populate_history_tree() # Use current sort
+                         self.request_history_rebuild() # Use current sort
                          # Update entry count directly
                          if hasattr(self, 'entry_count_label'):
                              self.entry_count_label.setText(f"Entries: {len(self.history_data)}")
@@ -1159,6 +1224,7 @@ class MainWindow(QMainWindow):
                 # Ensure entries match headers before writing
                 filtered_entries = [{k: entry.get(k, 'N/A') for k in fieldnames} for entry in entries]
                 writer.writerows(filtered_entries)
+            self._history_csv_mtime = self._get_history_csv_mtime()
             logger.info(f"Appended {len(entries)} imported entries to {STATS_CSV_FILE}")
         except Exception as e:
             logger.error(f"Error appending imported entries to {STATS_CSV_FILE}: {e}", exc_info=True)
@@ -1173,18 +1239,22 @@ class MainWindow(QMainWindow):
 
         if confirm == QMessageBox.StandardButton.Yes:
             logger.info("Clearing history...")
+            # Rows still waiting for a batched write belong to the history being cleared
+            self._pending_history_rows = []
+            self._history_flush_timer.stop()
             # Clear the CSV file (write only headers)
             try:
                 with open(STATS_CSV_FILE, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
                     writer.writerow(self.history_headers) # Write headers back
+                self._history_csv_mtime = self._get_history_csv_mtime()
                 logger.info(f"Cleared history file: {STATS_CSV_FILE}")
                 
                 # Clear the in-memory data
                 self.history_data = []
                 
                 # Update the history view
-                self.populate_history_tree()
+                self.request_history_rebuild()
 
                 # --- REMOVED Debugging lines --- 
                 
@@ -1439,21 +1509,21 @@ class MainWindow(QMainWindow):
              QMessageBox.critical(self, "Monitor Error", f"Could not start the replay monitor thread.\nError: {e}")
              self.monitor_thread = None # Ensure it's None if start fails
 
-    def stop_monitor_thread(self):
-        """Stops the replay monitor thread if it's running."""
+    def stop_monitor_thread(self, wait=False):
+        """Stops the replay monitor thread if it's running.
+           Only blocks when wait=True (application exit); otherwise the thread winds down in the
+           background and is deleted once it has finished, so the GUI never stalls on it.
+        """
         if self.monitor_thread and self.monitor_thread.isRunning():
             logger.info("Stopping replay monitor thread...")
             try:
                 self.monitor_thread.stop() # Call the thread's stop method
-                # Wait a short time for the thread to finish gracefully
-                if not self.monitor_thread.wait(2000): # Wait up to 2 seconds
-                    logger.warning("Monitor thread did not stop gracefully after 2 seconds. Terminating.")
-                    self.monitor_thread.terminate() # Force stop if needed
-                    self.monitor_thread.wait() # Wait after terminate
-                logger.info("Monitor thread stopped.")
-                # Only update status if monitoring was truly disabled, not just restarting
-                # if not self.config_data.get('monitor_replays', True):
-                #      self.statusLabel.setText("Monitoring stopped.")
+                if not wait:
+                    thread = self.monitor_thread
+                    self._stopping_monitor_threads.add(thread)
+                    thread.finished.connect(lambda: self._stopping_monitor_threads.discard(thread))
+                    thread.finished.connect(thread.deleteLater)
+                    if thread.isFinished(): self._stopping_monitor_threads.discard(thread) # Finished before we connected
             except Exception as e:
                  logger.error(f"Error stopping monitor thread: {e}", exc_info=True)
                  # Update status even if stop fails?
@@ -1461,6 +1531,15 @@ class MainWindow(QMainWindow):
         else:
              logger.debug("Stop monitor requested, but thread was not running or doesn't exist.")
 
+        if wait: # Exiting: make sure neither this monitor nor earlier ones are still running
+            for thread in [self.monitor_thread, *self._stopping_monitor_threads]:
+                if thread is not None and not thread.wait(2000): # Wait up to 2 seconds
+                    logger.warning("Monitor thread did not stop gracefully after 2 seconds. Terminating.")
+                    thread.terminate() # Force stop if needed
+                    thread.wait() # Wait after terminate
+            self._stopping_monitor_threads.clear()
+            logger.info("Monitor thread stopped.")
+
         self.monitor_thread = None # Clear reference
 
     @pyqtSlot(str)
@@ -1483,18 +1562,30 @@ class MainWindow(QMainWindow):
             self.statusLabel.setText("Analysis cancelled: osu!.db not loaded.") # Update status
             return
 
-        if self.analysis_thread and self.analysis_thread.isRunning():
-            # Maybe allow queuing later?
-            QMessageBox.warning(self, "Analysis Busy", "An analysis is already in progress. Please wait.")
-            logger.warning("Analysis cancelled: Another analysis is running.")
+        if self._analysis_busy:
+            if replay_path in self._queued_replays:
+                logger.debug("Replay already queued, ignoring: %s", replay_path)
+                return
+            if len(self.replay_queue) == self.replay_queue.maxlen:
+                logger.warning(f"Replay queue full ({self.replay_queue.maxlen}); dropping oldest: {self.replay_queue[0]}")
+                self._queued_replays.discard(self.replay_queue[0])
+            self.replay_queue.append(replay_path); self._queued_replays.add(replay_path)
+            logger.info(f"Analysis busy, queued replay ({len(self.replay_queue)} waiting): {replay_path}")
+            self.statusLabel.setText(f"Queued: {os.path.basename(replay_path)} ({len(self.replay_queue)} waiting)")
             return
 
+        self._analysis_busy = True # Before processEvents, so replays detected meanwhile are queued behind this one
         logger.info(f"Starting analysis for: {replay_path}")
         self.statusLabel.setText(f"Analyzing: {os.path.basename(replay_path)}...")
         QApplication.processEvents() # Ensure UI updates
 
-        # Create worker and thread
-        self.analysis_worker = AnalysisWorker(replay_path) # Pass replay path
+        if self.analysis_thread is None:
+            self.start_analysis_worker()
+        self.analyze_path.emit(replay_path) # Runs on the worker thread
+
+    def start_analysis_worker(self):
+        """Creates the long-lived analysis thread and worker; replays are posted to it via analyze_path."""
+        self.analysis_worker = AnalysisWorker()
         self.analysis_thread = QThread(self) # Parent thread to main window for management
         self.analysis_worker.moveToThread(self.analysis_thread)
 
@@ -1502,23 +1593,26 @@ class MainWindow(QMainWindow):
         self.analysis_worker.analysis_complete.connect(self.handle_analysis_complete)
         self.analysis_worker.status_update.connect(self.update_status)
         self.analysis_worker.error_occurred.connect(self.handle_analysis_error)
+        self.analysis_worker.analysis_finished.connect(self.on_analysis_finished)
+        self.analyze_path.connect(self.analysis_worker.analyze_replay, Qt.ConnectionType.QueuedConnection)
 
-        # Connect thread signals
-        self.analysis_thread.started.connect(self.analysis_worker.run)
-        # Ensure thread quits after worker is done
-        self.analysis_worker.analysis_complete.connect(self.analysis_thread.quit)
-        self.analysis_worker.error_occurred.connect(lambda e: self.analysis_thread.quit()) # Quit on error too
-        # Clean up worker and thread objects after thread finishes
+        # The worker is deleted together with its thread on quit
         self.analysis_thread.finished.connect(self.analysis_worker.deleteLater)
-        self.analysis_thread.finished.connect(self.analysis_thread.deleteLater)
-        # Clear references after cleanup
-        self.analysis_thread.finished.connect(lambda: setattr(self, 'analysis_worker', None))
-        self.analysis_thread.finished.connect(lambda: setattr(self, 'analysis_thread', None))
-        self.analysis_thread.finished.connect(lambda: logger.debug("Analysis thread finished and cleaned up."))
-
-        # Start the thread
         self.analysis_thread.start()
-        logger.debug("Analysis thread started.")
+        logger.debug("Analysis worker thread started.")
+
+    @pyqtSlot()
+    def on_analysis_finished(self):
+        """The worker finished one replay (successfully or not); move on to the next queued one."""
+        self._analysis_busy = False
+        self.start_next_queued_analysis()
+
+    def start_next_queued_analysis(self):
+        """Starts analysis of the next queued replay, if any."""
+        if self.replay_queue:
+            replay_path = self.replay_queue.popleft()
+            self._queued_replays.discard(replay_path)
+            self.start_analysis(replay_path)
 
     @pyqtSlot(dict)
     def handle_analysis_complete(self, results):
@@ -1531,13 +1625,13 @@ class MainWindow(QMainWindow):
         self.last_analysis_avg_offset = results.get("avg_offset") # Can be None
         self.last_analysis_ur = results.get("ur")                 # Can be None
         self.last_analysis_hit_offsets = results.get("hit_offsets", []) # Default to empty list
-        logger.debug(f"Stored analysis results: AvgOffset={self.last_analysis_avg_offset}, UR={self.last_analysis_ur}, NumOffsets={len(self.last_analysis_hit_offsets)}")
+        logger.debug("Stored analysis results: AvgOffset=%s, UR=%s, NumOffsets=%d", self.last_analysis_avg_offset, self.last_analysis_ur, len(self.last_analysis_hit_offsets))
 
         # --- Update UI ---
         self.update_analyzer_stats(results) # Updates text cards
         self.update_analyzer_graph(results) # Update graph with actual data
 
-        # --- Add to History (this already calls populate_history_tree) --- 
+        # --- Add to History (inserts the new row into the history model) --- 
         self.add_history_entry(results)
 
         # --- REMOVED Redundant call to refresh History Tree --- 
@@ -1957,9 +2051,11 @@ class MainWindow(QMainWindow):
                 logger.info("Window hidden to system tray by user choice (Yes).")
             elif reply == QMessageBox.StandardButton.No: # User chose No (Quit)
                 logger.info("Close event accepted by user choice (No -> Quit). Stopping threads...")
+                self.flush_pending_history_rows() # Write any batched history rows
                 self.stop_osu_process_monitor() # Stop osu! monitor first
-                self.stop_monitor_thread() # Stop replay monitor
+                self.stop_monitor_thread(wait=True) # Stop replay monitor
                 self.stop_analysis_thread_on_quit() # Stop analysis
+                close_sr_cache()
                 logger.info("Exiting application via user choice (No -> Quit).")
                 event.accept() # Accept the close event to quit
             else: # User chose Cancel or closed the dialog
@@ -1968,44 +2064,70 @@ class MainWindow(QMainWindow):
         else:
             # Minimize setting is off or tray not available, proceed with normal quit
             logger.info("Close event triggered (Minimize setting off or tray unavailable). Stopping threads and quitting...")
+            self.flush_pending_history_rows() # Write any batched history rows
             self.stop_osu_process_monitor()
-            self.stop_monitor_thread()
+            self.stop_monitor_thread(wait=True)
             self.stop_analysis_thread_on_quit()
+            close_sr_cache()
             logger.info("Exiting application via closeEvent (standard quit).")
             event.accept()
 
     # --- Load History from CSV --- 
+    def _read_history_csv(self, csvfile):
+        """Reads history rows from an open CSV file as entry dicts keyed by self.history_headers.
+           Column positions are resolved once from the header, rows are plain csv.reader lists.
+           Returns (entries, fieldnames); entries is None if a required header is missing.
+        """
+        reader = csv.reader(csvfile)
+        fieldnames = next(reader, None)
+        if not fieldnames or not all(h in fieldnames for h in self.history_headers):
+            return None, fieldnames
+        column_indices = [(h, fieldnames.index(h)) for h in self.history_headers]
+        entries = []
+        for row in reader:
+            if not row: continue # Blank line (DictReader skipped these too)
+            row_len = len(row)
+            entries.append({h: row[i] if i < row_len else "N/A" for h, i in column_indices})
+        return entries, fieldnames
+
+    @staticmethod
+    def _get_history_csv_mtime():
+        try: return os.stat(STATS_CSV_FILE).st_mtime_ns
+        except OSError: return None
+
+    def reload_history_if_changed(self):
+        """Reloads history from the CSV only if the file was changed by something other than this app.
+           Normal analyses are inserted incrementally and never need this.
+        """
+        if self._get_history_csv_mtime() == getattr(self, '_history_csv_mtime', None):
+            return
+        logger.info(f"History file changed on disk, reloading: {STATS_CSV_FILE}")
+        self.flush_pending_history_rows() # Keep rows that were only buffered so far
+        self.history_data = self.load_history_from_csv()
+        self.request_history_rebuild()
+        label_to_update = self.findChild(QLabel, "historyStatsLabel")
+        if label_to_update:
+            label_to_update.setText(f"Entries: {len(self.history_data)}")
+
     def load_history_from_csv(self):
         """Loads history data from the CSV file."""
         history = []
+        self._history_csv_mtime = self._get_history_csv_mtime() # Before reading, so a write during the read still counts as a change
         if not os.path.isfile(STATS_CSV_FILE):
             logger.warning(f"History file not found: {STATS_CSV_FILE}. No history loaded.")
             return history # Return empty list
 
         try:
-            with open(STATS_CSV_FILE, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                # Check if headers exist and match expected format
-                # Use self.history_headers (defined in __init__) for consistency
-                # REMOVED fallback definition
-                # if not hasattr(self, 'history_headers'):
-                #      # Define headers if they weren't created yet (should match create_history_page)
-                #      self.history_headers = ['Timestamp', 'MapName', 'Mods', 'AvgOffsetMs', 'UR', 'MatchedHits', 'Score', 'StarRating']
-                #      logger.warning("history_headers defined within load_history_from_csv as it didn't exist yet.")
-
-                # Compare reader fieldnames against the dynamic self.history_headers
-                if not reader.fieldnames or not all(h in reader.fieldnames for h in self.history_headers):
+            with open(STATS_CSV_FILE, 'r', newline='', encoding='utf-8', buffering=CSV_READ_BUFFER_SIZE) as csvfile:
+                # Compare the file's header against the dynamic self.history_headers
+                rows, fieldnames = self._read_history_csv(csvfile)
+                if rows is None:
                      logger.error(f"History file {STATS_CSV_FILE} has missing or incorrect headers.")
                      logger.error(f"Expected headers (approx): {self.history_headers}")
-                     logger.error(f"Found headers in file: {reader.fieldnames}")
+                     logger.error(f"Found headers in file: {fieldnames}")
                      # Don't show popup here, handle gracefully
                      return history # Return empty list if headers mismatch
-
-                for row in reader:
-                    # Basic validation or cleaning could happen here if needed
-                    # Create entry using defined headers, taking values from row or default
-                    entry = {h: row.get(h, "N/A") for h in self.history_headers}
-                    history.append(entry)
+                history = rows
 
             logger.info(f"Loaded {len(history)} entries from {STATS_CSV_FILE}")
             # Sort by timestamp descending (most recent first) - assuming Timestamp format is sortable
@@ -2026,7 +2148,7 @@ class MainWindow(QMainWindow):
         """Adds a new entry to the history data and saves it.
            Refreshes the history view.
         """
-        logger.debug(f"Adding history entry: {results}")
+        logger.debug("Adding history entry: %s", results) # Lazy: results carries the full hit offset list
         
         # Prepare the entry dictionary in the correct format/order for CSV/Table
         # Use the defined headers to ensure order and presence of keys
@@ -2054,20 +2176,37 @@ class MainWindow(QMainWindow):
              logger.error("Could not find QLabel with objectName 'historyStatsLabel' to update.")
         # --- End Update ---
 
-        # --- Save the single new entry to CSV ---
-        if not self.save_single_history_entry_to_csv(entry_dict):
-             logger.error("Failed to save the new history entry to CSV.")
-             # Optionally inform user, but maybe too noisy?
+        # --- Queue the new entry for the next batched CSV write ---
+        self.queue_history_entry_for_csv(entry_dict)
 
-        # --- Refresh the history view ---
-        # Important: Filter text needs to be reapplied!
-        current_filter = self.history_filter_input.text() if hasattr(self, 'history_filter_input') else None
-        self.populate_history_tree(filter_text=current_filter) 
+        # --- Insert just this row into the history view (placed by the current search and sort) ---
+        if hasattr(self, 'history_model'):
+            self.history_model.add_entry(entry_dict)
 
         logger.info(f"Added new history entry for map: {entry_dict['MapName']}")
 
-    def save_single_history_entry_to_csv(self, entry_dict):
-        """Appends a single analysis result entry to the stats CSV file."""
+    def queue_history_entry_for_csv(self, entry_dict):
+        """Buffers a history entry; the CSV is written every 8 rows or 2s after the first queued row."""
+        self._pending_history_rows.append(entry_dict)
+        if len(self._pending_history_rows) >= 8:
+            self.flush_pending_history_rows()
+        elif not self._history_flush_timer.isActive():
+            self._history_flush_timer.start()
+
+    def flush_pending_history_rows(self):
+        """Writes all buffered history entries to the CSV in one append."""
+        self._history_flush_timer.stop()
+        if not self._pending_history_rows:
+            return True
+        rows, self._pending_history_rows = self._pending_history_rows, []
+        if not self.save_history_entries_to_csv(rows):
+            logger.error("Failed to save new history entries to CSV. Keeping them queued for the next flush.")
+            self._pending_history_rows[:0] = rows
+            return False
+        return True
+
+    def save_history_entries_to_csv(self, entries):
+        """Appends analysis result entries to the stats CSV file with a single open."""
         if not hasattr(self, 'history_headers'):
              logger.error("Cannot save history entry: history_headers not defined.")
              return False # Return False on failure
@@ -2083,13 +2222,13 @@ class MainWindow(QMainWindow):
                     writer.writeheader()
                     logger.info(f"Created/found empty stats file: {STATS_CSV_FILE}")
 
-                # Ensure the entry dict only contains keys defined in fieldnames
-                filtered_entry = {k: entry_dict.get(k, 'N/A') for k in fieldnames}
-                writer.writerow(filtered_entry)
-                logger.info(f"Saved single entry to {STATS_CSV_FILE}")
-                return True # <-- ADDED: Return True on success
+                # Ensure the entry dicts only contain keys defined in fieldnames
+                writer.writerows({k: entry.get(k, 'N/A') for k in fieldnames} for entry in entries)
+                logger.info(f"Saved {len(entries)} entries to {STATS_CSV_FILE}")
+            self._history_csv_mtime = self._get_history_csv_mtime() # Our own write, not an external change
+            return True # <-- ADDED: Return True on success
         except IOError as e:
-            logger.error(f"IOError writing single entry to stats file {STATS_CSV_FILE}: {e}")
+            logger.error(f"IOError writing entries to stats file {STATS_CSV_FILE}: {e}")
             QMessageBox.warning(self, "History Save Error", f"Could not save analysis result to:\n{STATS_CSV_FILE}\n\nError: {e}")
             return False # Return False on failure
         except Exception as e:
@@ -2186,90 +2325,6 @@ class MainWindow(QMainWindow):
         # Return dict containing references to labels for updating
         return {"frame": card_frame, "title_label": title_label, "value_label": value_label}
 
-    def _get_score_value(self, score_str):
-        """Helper to convert score string to a sortable numeric value."""
-        try:
-            return int(str(score_str).replace(',', ''))
-        except (ValueError, TypeError):
-            return -1 # Treat N/A or invalid scores as lowest
-
-    def _create_history_tree_item(self, entry):
-        """Helper function to create and populate a QTreeWidgetItem from an entry dict."""
-        try:
-            item = QTreeWidgetItem()
-            for col_index, header in enumerate(self.history_headers):
-                value = entry.get(header, "N/A")
-                icon_path = None
-                item_text = str(value)
-
-                # --- Formatting --- 
-                if header == 'StarRating':
-                    icon_path = os.path.join(icon_base_dir, 'star.svg')
-                    try:
-                        num_val = float(str(value).replace('*','').strip())
-                        item_text = f"{num_val:.2f}"
-                    except (ValueError, TypeError):
-                        item_text = "N/A"
-                elif header == 'Score':
-                    try:
-                        # Format with comma, using the helper ensures numeric value first
-                        score_val = self._get_score_value(value)
-                        item_text = f"{score_val:,}" if score_val != -1 else "N/A"
-                    except (ValueError, TypeError):
-                        item_text = "N/A"
-                # Keep default item_text for other columns
-
-                item.setText(col_index, item_text)
-
-                # --- Icon --- 
-                # Re-enabled icon setting
-                if icon_path and os.path.exists(icon_path):
-                    icon = QIcon(icon_path)
-                    if not icon.isNull():
-                        item.setIcon(col_index, icon)
-
-                # --- Alignment --- 
-                if header in ['AvgOffsetMs', 'UR', 'Score', 'StarRating', 'MatchedHits', 'Timestamp']:
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                elif header == 'MapName':
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                else: # Mods
-                    item.setTextAlignment(col_index, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-                    
-                # --- Set Size Hint for StarRating Column --- 
-                # Removed sizeHint setting
-                # if header == 'StarRating':
-                #      item.setSizeHint(col_index, QSize(40, 0))
-
-                # --- Sorting Data (store sortable values) --- 
-                sort_value = None
-                if header == 'Timestamp':
-                    try: sort_value = datetime.strptime(str(value), '%Y-%m-%d %H:%M:%S')
-                    except ValueError: sort_value = datetime.min
-                elif header == 'Score':
-                    sort_value = self._get_score_value(value)
-                elif header in ['AvgOffsetMs', 'UR', 'StarRating', 'MatchedHits']:
-                    try:
-                        num_str = str(value).replace('+','').replace('ms','').replace('*','').replace(',','').strip()
-                        sort_value = -float('inf') if num_str.upper() == "N/A" else float(num_str)
-                    except ValueError:
-                        sort_value = -float('inf')
-                else: # MapName, Mods
-                    sort_value = str(value).lower()
-                
-                item.setData(col_index, Qt.ItemDataRole.UserRole, sort_value)
-                
-            return item # Return the successfully created item
-        except Exception as e:
-            logger.error(f"Error creating tree item for entry: {entry}", exc_info=True)
-            return None # Explicitly return None on error
-
-    def filter_history(self):
-        """Slot called when the history filter input text changes."""
-        # Trigger repopulate, which reads filter input and current sort state from combo box
-        logger.debug("Filter input changed, repopulating history tree.")
-        self.populate_history_tree()
-
     # --- Tray Icon Methods --- 
     def create_tray_icon(self):
         self.tray_icon = None # Initialize to None
@@ -2321,20 +2376,24 @@ class MainWindow(QMainWindow):
     def quit_application(self):
         """Ensures application quits properly, stopping threads."""
         logger.info("Quit action triggered from tray menu.")
-        self.stop_monitor_thread() # Stop monitor first
+        self.flush_pending_history_rows() # Write any batched history rows
+        self.stop_monitor_thread(wait=True) # Stop monitor first
         self.stop_analysis_thread_on_quit() # Stop analysis if running
+        close_sr_cache()
         QApplication.instance().quit() # Use instance().quit()
         
     # Renamed original stop_analysis for clarity
     def stop_analysis_thread_on_quit(self):
+         self.replay_queue.clear(); self._queued_replays.clear()
          if self.analysis_thread and self.analysis_thread.isRunning():
-             logger.info("Analysis is currently running. Requesting worker stop for quit...")
+             logger.info("Stopping analysis worker thread for quit...")
              if hasattr(self.analysis_worker, 'stop') and callable(getattr(self.analysis_worker, 'stop')):
                   try:
                        logger.debug("Calling worker.stop() for quit")
-                       self.analysis_worker.stop()
+                       self.analysis_worker.stop() # Replays already posted to the worker are skipped
                   except Exception as e:
                        logger.error(f"Error calling worker.stop() on quit: {e}")
+             self.analysis_thread.quit() # Leaves its event loop once the current replay is done
              logger.info("Waiting briefly for analysis thread to finish before quit...")
              if not self.analysis_thread.wait(1000): # Shorter wait on quit
                   logger.warning("Analysis thread did not finish gracefully on quit. Terminating.")
@@ -0,0 +1,55 @@
+# osr_header.py
+
+from construct import Struct, LazyBound, Prefixed, GreedyBytes, Int8ub, Int16ul, Int32ul, Int64ul
+from osu_string import osu_string
+
+# Leading fields of an .osr replay; enough to route it before the LZMA frame data is touched
+osr_header = Struct(
+    'mode' / Int8ub,
+    'version' / Int32ul,
+    'beatmap_hash' / LazyBound(lambda: osu_string),
+)
+
+# Everything up to and including the LZMA-compressed frame data; the trailing score id is not needed
+osr_replay = Struct(
+    'mode' / Int8ub,
+    'version' / Int32ul,
+    'beatmap_hash' / LazyBound(lambda: osu_string),
+    'player_name' / LazyBound(lambda: osu_string),
+    'replay_hash' / LazyBound(lambda: osu_string),
+    'count_300' / Int16ul,
+    'count_100' / Int16ul,
+    'count_50' / Int16ul,
+    'count_geki' / Int16ul,
+    'count_katu' / Int16ul,
+    'count_miss' / Int16ul,
+    'score' / Int32ul,
+    'max_combo' / Int16ul,
+    'perfect' / Int8ub,
+    'mods' / Int32ul,
+    'life_bar' / LazyBound(lambda: osu_string),
+    'timestamp' / Int64ul,
+    'replay_data' / Prefixed(Int32ul, GreedyBytes),
+)
+
+
+if __name__ == "__main__":
+    import unittest
+
+    class HeaderTestCase(unittest.TestCase):
+        def test_round_trip(self):
+            header = dict(mode=0, version=20250107, beatmap_hash="d41d8cd98f00b204e9800998ecf8427e")
+            parsed = osr_header.parse(osr_header.build(header))
+            self.assertEqual(header["beatmap_hash"], parsed.beatmap_hash)
+            self.assertEqual(header["version"], parsed.version)
+
+    class ReplayTestCase(unittest.TestCase):
+        def test_round_trip(self):
+            replay = dict(mode=0, version=20250107, beatmap_hash="d41d8cd98f00b204e9800998ecf8427e", player_name="player",
+                          replay_hash="", count_300=1, count_100=0, count_50=0, count_geki=0, count_katu=0, count_miss=0,
+                          score=300, max_combo=1, perfect=1, mods=64, life_bar=None, timestamp=0, replay_data=b"lzma")
+            built = osr_replay.build(replay)
+            self.assertEqual(built, osr_replay.build(osr_replay.parse(built)))
+            self.assertEqual(osr_header.parse(built).beatmap_hash, replay["beatmap_hash"])
+
+    unittest.main()